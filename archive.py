@@ -0,0 +1,117 @@
+# Append-only history of every run's per-city predictions in SQLite, for
+# backtesting sunrise_score/sunset_score without mining git history.
+#
+# Rows are clustered on (slug, run_at) (WITHOUT ROWID), so a city/date-range
+# query is a single index range scan however many years are stored. The full
+# entry is kept zlib-compressed next to the headline columns.
+#
+# The scheduled workflow keeps the database on the prediction-archive branch
+# (a single commit, force-pushed after every run) and restores it from there
+# before the next run.
+import argparse
+import json
+import os
+import sqlite3
+import zlib
+from datetime import date, datetime, time, timezone
+
+ARCHIVE_PATH = os.environ.get("PREDICTION_ARCHIVE_PATH", os.path.join("archive", "predictions.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    slug TEXT NOT NULL,
+    run_at INTEGER NOT NULL,
+    forecast_date TEXT NOT NULL,
+    sunrise_score INTEGER,
+    sunset_score INTEGER,
+    moon_phase REAL,
+    fog_score REAL,
+    entry BLOB NOT NULL,
+    PRIMARY KEY (slug, run_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS predictions_by_date ON predictions (forecast_date, slug);
+"""
+
+
+def connect(path=ARCHIVE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def append_run(predictions, run_at, forecast_dates, path=ARCHIVE_PATH):
+    # forecast_dates: slug -> the date its entry is for (each city's local
+    # date). Re-running with the same run_at is a no-op rather than a duplicate.
+    run_epoch = int(run_at.timestamp())
+    rows = []
+    for slug, entry in predictions.items():
+        rows.append((
+            slug,
+            run_epoch,
+            forecast_dates[slug].isoformat(),
+            entry.get("sunrise_score"),
+            entry.get("sunset_score"),
+            (entry.get("moon_phase") or {}).get("value"),
+            (entry.get("recommended_shoot_time") or {}).get("fog_score"),
+            zlib.compress(json.dumps(entry, separators=(",", ":")).encode("utf-8")),
+        ))
+    connection = connect(path)
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def query(slug, start, end, include_entries=False, path=ARCHIVE_PATH):
+    # Runs for one city whose run time falls on start..end (inclusive, UTC dates)
+    start_epoch = int(datetime.combine(start, time.min, timezone.utc).timestamp())
+    end_epoch = int(datetime.combine(end, time.max, timezone.utc).timestamp())
+    columns = "run_at, forecast_date, sunrise_score, sunset_score, moon_phase, fog_score"
+    if include_entries:
+        columns += ", entry"
+
+    connection = connect(path)
+    try:
+        rows = connection.execute(
+            f"SELECT {columns} FROM predictions WHERE slug = ? AND run_at BETWEEN ? AND ? ORDER BY run_at",
+            (slug, start_epoch, end_epoch),
+        ).fetchall()
+    finally:
+        connection.close()
+
+    results = []
+    for row in rows:
+        result = {
+            "run_at": datetime.fromtimestamp(row[0], timezone.utc).isoformat(),
+            "forecast_date": row[1],
+            "sunrise_score": row[2],
+            "sunset_score": row[3],
+            "moon_phase": row[4],
+            "fog_score": row[5],
+        }
+        if include_entries:
+            result["entry"] = json.loads(zlib.decompress(row[6]))
+        results.append(result)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query archived predictions for one city.")
+    parser.add_argument("slug")
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today(), help="First run date (YYYY-MM-DD, UTC)")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="Last run date (YYYY-MM-DD, UTC)")
+    parser.add_argument("--entries", action="store_true", help="Include the full archived entries")
+    parser.add_argument("--path", default=ARCHIVE_PATH, help="SQLite archive file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(json.dumps(query(args.slug, args.start, args.end, args.entries, args.path), indent=2))
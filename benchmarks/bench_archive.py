@@ -0,0 +1,40 @@
+# City/date-range query latency over a synthetic multi-year archive.
+# Run from the repo root: python benchmarks/bench_archive.py
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import append_run, query  # noqa: E402
+
+YEARS = 3
+RUNS_PER_DAY = 6
+CITIES = 75
+
+if __name__ == "__main__":
+    path = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+    start = date(2023, 1, 1)
+    entry = {"sunrise_score": 5, "sunset_score": 6, "moon_phase": {"value": 3.2}, "fog_forecast": [{"fog_score": 2.5}] * 12}
+    predictions = {f"city-{index}": entry for index in range(CITIES)}
+
+    started = time.perf_counter()
+    days = YEARS * 365
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for run in range(RUNS_PER_DAY):
+            run_at = datetime(day.year, day.month, day.day, run * 24 // RUNS_PER_DAY, tzinfo=timezone.utc)
+            append_run(predictions, run_at, dict.fromkeys(predictions, day), path)
+    rows = days * RUNS_PER_DAY * CITIES
+    print(f"archive: {rows} rows in {time.perf_counter() - started:.1f}s, {os.path.getsize(path) / 1e6:.1f} MB")
+
+    for label, span in (("1 day", 0), ("1 month", 30), ("1 year", 364)):
+        first = start + timedelta(days=400)
+        best = float("inf")
+        for _ in range(20):
+            started = time.perf_counter()
+            results = query("city-42", first, first + timedelta(days=span), path=path)
+            best = min(best, time.perf_counter() - started)
+        print(f"query {label:<8} {len(results):>5} runs in {best * 1e3:.2f} ms")
@@ -0,0 +1,42 @@
+# Per-city astronomy cost: the old four sun() calls vs solar.solar_events().
+# Run from the repo root: python benchmarks/bench_astronomy.py
+import os
+import sys
+import timeit
+from datetime import date
+
+import pytz
+from astral.sun import sun
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_prediction import cities  # noqa: E402
+from solar import solar_events  # noqa: E402
+
+REPEAT = 5
+NUMBER = 20
+
+
+def legacy_events(observer, day, tz):
+    # What get_city_data used to do: four identical calls (depression was never applied)
+    return [sun(observer, date=day, tzinfo=tz) for _ in range(4)]
+
+
+def bench(label, calculate, day):
+    prepared = [(city["observer"], pytz.timezone(city["timezone"])) for city in cities]
+
+    def run():
+        for observer, tz in prepared:
+            calculate(observer, day, tz)
+
+    best = min(timeit.repeat(run, repeat=REPEAT, number=NUMBER)) / NUMBER
+    per_city = best / len(prepared) * 1e6
+    print(f"{label:<16} {per_city:8.1f} µs/city  {best * 1e3:7.2f} ms/run ({len(prepared)} cities)")
+    return per_city
+
+
+if __name__ == "__main__":
+    day = date.today()
+    before = bench("4x sun()", legacy_events, day)
+    after = bench("solar_events()", solar_events, day)
+    print(f"speedup: {before / after:.2f}x")
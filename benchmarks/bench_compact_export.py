@@ -0,0 +1,30 @@
+# Size and decode time of predictions.json vs the compact exports.
+# Run from the repo root after: python generate_prediction.py --compact
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_export import decode_binary  # noqa: E402
+
+NUMBER = 200
+
+FORMATS = [
+    ("predictions.json", json.loads),
+    ("predictions.min.json", json.loads),
+    ("predictions.bin", decode_binary),
+]
+
+if __name__ == "__main__":
+    print(f"{'file':<22} {'bytes':>9} {'gzipped':>9} {'decode':>10}")
+    for path, decode in FORMATS:
+        if not os.path.exists(path):
+            print(f"{path:<22} missing, run generate_prediction.py --compact first")
+            continue
+        with open(path, "rb") as f:
+            body = f.read()
+        seconds = min(timeit.repeat(lambda: decode(body), repeat=5, number=NUMBER)) / NUMBER
+        print(f"{path:<22} {len(body):>9} {len(gzip.compress(body)):>9} {seconds * 1e6:>8.1f}µs")
@@ -0,0 +1,67 @@
+# Cost of a 1 vs 7 vs 15 day horizon once the provider responses are in hand.
+# The request count doesn't change with the horizon (one timelinemulti request
+# per VISUAL_CROSSING_BATCH_SIZE cities either way), so this times what does:
+# decoding the larger synthetic Visual Crossing payloads, normalizing them into
+# hourly conditions and computing every city x day entry. Run from the repo root: python benchmarks/bench_horizon.py
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ephemeris  # noqa: E402
+from conditions import from_visual_crossing  # noqa: E402
+from generate_prediction import VISUAL_CROSSING_BATCH_SIZE, cities, get_city_data  # noqa: E402
+
+HORIZONS = (1, 7, 15)
+
+
+def synthetic_payload(city, start, days):
+    rnd = random.Random(city["slug"])
+    return {
+        "address": city["slug"],
+        "days": [
+            {
+                "datetime": (start + timedelta(days=offset)).isoformat(),
+                "sunrise": "06:30:00",
+                "sunset": "18:45:00",
+                "hours": [
+                    {"datetime": f"{hour:02d}:00:00", "cloudcover": rnd.uniform(0, 100), "visibility": rnd.uniform(0, 10)}
+                    for hour in range(24)
+                ],
+            }
+            for offset in range(days)
+        ],
+    }
+
+
+if __name__ == "__main__":
+    start = date.today()
+    if not ephemeris.is_current(cities, start):
+        ephemeris.build_ephemeris(cities, start, ephemeris.MIN_DAYS_AHEAD + 1)
+    requests = math.ceil(len(cities) / VISUAL_CROSSING_BATCH_SIZE)
+    # Warm the ephemeris mmap and moon phase cache so the 1-day row isn't paying for them
+    for city in cities:
+        get_city_data(city, "", from_visual_crossing(synthetic_payload(city, start, 1)), start)
+
+    for days in HORIZONS:
+        body = json.dumps({"locations": [synthetic_payload(city, start, days) for city in cities]}).encode("utf-8")
+        started = time.perf_counter()
+        locations = json.loads(body)["locations"]
+        decode = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for city, payload in zip(cities, locations):
+            conditions = from_visual_crossing(payload)
+            for offset in range(days):
+                get_city_data(city, "", conditions, start + timedelta(days=offset))
+        compute = time.perf_counter() - started
+
+        print(
+            f"{days:>2} days: {requests} requests, {len(body) / 1024:.0f} KiB, decode {decode * 1e3:.1f} ms, "
+            f"compute {compute * 1e3:.1f} ms ({compute / (len(cities) * days) * 1e6:.0f} µs/city-day)"
+        )
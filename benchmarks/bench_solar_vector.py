@@ -0,0 +1,32 @@
+# Full-year sun/twilight table for every city with solar_vector, checked
+# against astral. Run from the repo root: python benchmarks/bench_solar_vector.py
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_prediction import cities  # noqa: E402
+from solar_vector import city_table, date_range, max_error_against_astral  # noqa: E402
+
+DAYS = 366
+REPEAT = 5
+
+if __name__ == "__main__":
+    dates = date_range(date(date.today().year, 1, 1), DAYS)
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        city_table(cities, dates)
+        best = min(best, time.perf_counter() - started)
+    cells = len(cities) * DAYS
+    print(f"solar_vector: {len(cities)} cities x {DAYS} days in {best * 1e3:.1f} ms ({best / cells * 1e6:.2f} µs/city-day)")
+
+    started = time.perf_counter()
+    error = max_error_against_astral(cities, dates)
+    elapsed = time.perf_counter() - started
+    print(f"astral loop:  same table in {elapsed * 1e3:.1f} ms, max difference {error:.3f}s")
+    if error >= 1.0:
+        sys.exit("❌ solar_vector disagrees with astral by a second or more")
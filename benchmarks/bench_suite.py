@@ -0,0 +1,223 @@
+# Reproducible timings of the prediction pipeline at 26, 75 and 1,000 cities.
+#
+# Provider calls are answered from benchmarks/fixtures through
+# fixture_transport.py, so no keys or network are needed and every run sees the
+# same data. Sizes above the number of cities in cities.json are filled with
+# synthetic cities near the real ones. Everything runs in a temporary directory.
+#
+# Results are written to benchmarks/results/<label>.json; compare two runs with
+#   python benchmarks/bench_suite.py --compare benchmarks/results/a.json benchmarks/results/b.json
+# Run from the repo root: python benchmarks/bench_suite.py --label baseline
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+import pytz
+from astral import LocationInfo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Fixtures cost nothing, so the free tier rate limits and quotas don't apply
+for provider in ("VISUAL_CROSSING", "METEOSOURCE"):
+    os.environ.setdefault(f"{provider}_RATE_PER_MINUTE", "0")
+    os.environ.setdefault(f"{provider}_DAILY_QUOTA", "0")
+
+import ephemeris  # noqa: E402
+import fixture_transport  # noqa: E402
+import generate_prediction  # noqa: E402
+from solar import moon_events, solar_events  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def city_set(size):
+    # The real cities first, then copies shifted by up to a few degrees
+    base = generate_prediction.cities
+    selected = list(base[:size])
+    index = 0
+    while len(selected) < size:
+        city = base[index % len(base)]
+        ring = index // len(base) + 1
+        latitude = max(-65.0, min(65.0, city["observer"].latitude + (ring % 7 - 3) * 0.7))
+        longitude = ((city["observer"].longitude + (ring // 7 - 3) * 0.9 + 180) % 360) - 180
+        slug = f"{city['slug']}-{ring}"
+        selected.append({
+            "slug": slug,
+            "name": f"{city['name']} {ring}",
+            "timezone": city["timezone"],
+            "observer": LocationInfo(slug, "", city["timezone"], round(latitude, 4), round(longitude, 4)).observer,
+        })
+        index += 1
+    return selected
+
+
+def measure(run, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times), statistics.median(times)
+
+
+def quietly(run):
+    def wrapped():
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+    return wrapped
+
+
+def clear_outputs():
+    for path in (".cache/responses", ".cache/fingerprints.json", "predictions", "predictions.json"):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def bench_size(size, repeat, workers):
+    cities = city_set(size)
+    generate_prediction.cities = cities
+    today = date.today()
+    ephemeris.build_ephemeris(cities, today, ephemeris.MIN_DAYS_AHEAD + 1)
+    results = []
+
+    def record(name, run, runs=repeat):
+        best, median = measure(run, runs)
+        results.append({
+            "name": name,
+            "cities": size,
+            "best_seconds": round(best, 6),
+            "median_seconds": round(median, 6),
+            "per_city_us": round(best / size * 1e6, 1),
+        })
+        print(f"{name:<36} {size:>5} cities  best {best * 1e3:9.2f} ms  median {median * 1e3:9.2f} ms  {best / size * 1e6:9.1f} µs/city")
+
+    def cold_run():
+        clear_outputs()
+        generate_prediction.create_predictions_file(workers=workers, archive=False)
+
+    record("create_predictions_file (cold cache)", quietly(cold_run))
+    record("create_predictions_file (warm cache)", quietly(lambda: generate_prediction.create_predictions_file(workers=workers, archive=False)))
+
+    timezones = [pytz.timezone(city["timezone"]) for city in cities]
+    weather = generate_prediction.prefetch_visual_crossing(cities, today)
+
+    def city_data():
+        for city in cities:
+            conditions = generate_prediction.visual_crossing_conditions(city, today, weather[city["slug"]])
+            generate_prediction.get_city_data(city, "", conditions, today)
+
+    record("get_city_data", city_data)
+
+    events = [generate_prediction.get_astronomy(city, today, tz) for city, tz in zip(cities, timezones)]
+    conditions = [generate_prediction.visual_crossing_conditions(city, today, weather[city["slug"]]) for city in cities]
+
+    def twilight():
+        for city_events, city_conditions, tz in zip(events, conditions, timezones):
+            # Time building the fog timeline too, not just the memoized lookup
+            city_conditions.timelines.clear()
+            generate_prediction.analyze_twilight_conditions(city_events, city_conditions, tz)
+
+    record("analyze_twilight_conditions", twilight)
+
+    def astronomy_table():
+        for city, tz in zip(cities, timezones):
+            generate_prediction.get_astronomy(city, today, tz)
+
+    def astronomy_astral():
+        for city, tz in zip(cities, timezones):
+            solar_events(city["observer"], today, tz)
+            moon_events(city["observer"], today)
+
+    record("astronomy (ephemeris table)", astronomy_table)
+    record("astronomy (astral)", astronomy_astral)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    previous = {(item["name"], item["cities"]): item for item in before["results"]}
+    print(f"{before['label']} ({before['git_commit']}) -> {after['label']} ({after['git_commit']})")
+    for item in after["results"]:
+        old = previous.get((item["name"], item["cities"]))
+        if old is None:
+            continue
+        ratio = item["best_seconds"] / old["best_seconds"] if old["best_seconds"] else float("inf")
+        print(
+            f"{item['name']:<36} {item['cities']:>5} cities  {old['best_seconds'] * 1e3:9.2f} ms -> "
+            f"{item['best_seconds'] * 1e3:9.2f} ms  ({ratio:.2f}x)"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the prediction pipeline against recorded provider fixtures.")
+    parser.add_argument("--label", default="local", help="Name of the results file")
+    parser.add_argument("--sizes", default="26,75,1000", help="Comma-separated city counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=8, help="Workers for create_predictions_file")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every fixture response")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two results files and exit")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+        sys.exit()
+
+    adapter = fixture_transport.install(args.latency)
+    fixtures_source = fixture_transport.load_fixture("visual_crossing")["source"]
+    workdir = tempfile.mkdtemp(prefix="sunset-bench-")
+    os.chdir(workdir)
+
+    results = []
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            results.extend(bench_size(size, args.repeat, args.workers))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{args.label}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "label": args.label,
+            "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": fixtures_source,
+            "latency_seconds": args.latency,
+            "workers": args.workers,
+            "repeat": args.repeat,
+            "provider_calls": adapter.calls,
+            "results": results,
+        }, f, indent=2)
+    print(f"✅ results written to {path}")
@@ -0,0 +1,85 @@
+# Simulates --schedule runs every 30 minutes (the workflow cron) over two days
+# and checks that every city is refreshed inside the lead window of each of its
+# sunrises and sunsets, whatever its offset from UTC. Exits non-zero when an
+# event is missed. Run from the repo root: python benchmarks/check_schedule.py
+import argparse
+import os
+import statistics
+import sys
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler  # noqa: E402
+from generate_prediction import cities, city_events, local_date  # noqa: E402
+
+
+@lru_cache(maxsize=None)
+def events_on(slug, day):
+    return city_events(by_slug[slug], day)
+
+
+def simulate(start, hours, interval):
+    # Every due city is refreshed at the tick it's due, as when no provider fails
+    state = {}
+    tick = start
+    while tick < start + timedelta(hours=hours):
+        due, _, _ = scheduler.plan(cities, tick, lambda city: events_on(city["slug"], local_date(city, tick)), state)
+        scheduler.record(state, [city["slug"] for city in due], tick)
+        tick += timedelta(minutes=interval)
+    return state
+
+
+def check(state, start, end, lead):
+    # Events whose whole lead window falls inside the simulation, by city
+    missed = []
+    refreshes_per_window = []
+    ages = []
+    for city in cities:
+        refreshes = [datetime.fromtimestamp(epoch, timezone.utc) for epoch in state.get(city["slug"], [])]
+        first = local_date(city, start) - timedelta(days=1)
+        for offset in range(4):
+            events = events_on(city["slug"], first + timedelta(days=offset))
+            for name in scheduler.EVENTS:
+                event = events.get(name)
+                if event is None or event - timedelta(minutes=lead) <= start or event > end:
+                    continue
+                inside = [refreshed for refreshed in refreshes if event - timedelta(minutes=lead) <= refreshed < event]
+                refreshes_per_window.append(len(inside))
+                if inside:
+                    ages.append((event - inside[-1]).total_seconds() / 60)
+                else:
+                    missed.append((city["slug"], name, event.astimezone(timezone.utc)))
+    return missed, refreshes_per_window, ages
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check that --schedule refreshes every city ahead of each sunrise and sunset.")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="First run, UTC (default: today 00:00 UTC)")
+    parser.add_argument("--hours", type=int, default=48)
+    parser.add_argument("--interval", type=int, default=30, help="Minutes between runs")
+    return parser.parse_args()
+
+
+by_slug = {city["slug"]: city for city in cities}
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = args.start or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = start + timedelta(hours=args.hours)
+
+    state = simulate(start, args.hours, args.interval)
+    missed, refreshes_per_window, ages = check(state, start, end, scheduler.LEAD_MINUTES)
+    runs = sum(len(refreshes) for refreshes in state.values())
+    print(
+        f"📅 {len(cities)} cities, {args.hours}h of runs every {args.interval} min from {start.isoformat()}: "
+        f"{runs} city refreshes, {len(refreshes_per_window)} events, "
+        f"{sum(count == 1 for count in refreshes_per_window)} refreshed once in their lead window, "
+        f"median data age at event {statistics.median(ages) if ages else float('nan'):.0f} min"
+    )
+    for slug, name, at in missed:
+        print(f"❌ {slug}: no refresh in the {scheduler.LEAD_MINUTES} min before {name} at {at.isoformat()}")
+    sys.exit(1 if missed else 0)
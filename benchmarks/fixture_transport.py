@@ -0,0 +1,117 @@
+# A requests transport adapter that answers provider calls from the fixtures in
+# benchmarks/fixtures instead of the network.
+#
+# install() mounts it on every ProviderClient session, so the whole pipeline
+# (pooling, retries, streaming, caching, parsing) runs unchanged. Each location
+# is mapped to one of the recorded responses by hash, and dates are rewritten to
+# the requested ones, so any number of cities on any date gets a plausible,
+# repeatable answer. An optional fixed latency stands in for the network.
+import copy
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, f"{name}.json")) as f:
+        return json.load(f)
+
+
+def pick(responses, key):
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return copy.deepcopy(responses[int.from_bytes(digest[:4], "little") % len(responses)])
+
+
+class FixtureAdapter(BaseAdapter):
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self.fixtures = {name: load_fixture(name)["responses"] for name in ("visual_crossing", "meteosource", "weatherapi")}
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def send(self, request, stream=False, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlsplit(request.url)
+        query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        if "visualcrossing" in parts.netloc:
+            provider, payload = "visual_crossing", self.visual_crossing(parts.path, query)
+        elif "meteosource" in parts.netloc:
+            provider, payload = "meteosource", self.meteosource(query)
+        elif "weatherapi" in parts.netloc:
+            provider, payload = "weatherapi", self.fixtures["weatherapi"][0]
+        else:
+            raise ValueError(f"No fixture for {request.url}")
+        with self.lock:
+            self.calls[provider] = self.calls.get(provider, 0) + 1
+        return self.build_response(request, payload)
+
+    def visual_crossing_days(self, location, start, end):
+        template = pick(self.fixtures["visual_crossing"], location)
+        days = []
+        day = start
+        while day <= end:
+            day_data = copy.deepcopy(template["days"][len(days) % len(template["days"])])
+            day_data["datetime"] = day.isoformat()
+            days.append(day_data)
+            day += timedelta(days=1)
+        return {**template, "address": location, "days": days}
+
+    def visual_crossing(self, path, query):
+        if path.endswith("/timelinemulti"):
+            start = date.fromisoformat(query["datestart"])
+            end = date.fromisoformat(query["dateend"])
+            locations = query["locations"].split("|")
+            return {"locations": [self.visual_crossing_days(location, start, end) for location in locations]}
+        match = re.search(r"/timeline/([^/]+)/([0-9-]+)(?:/([0-9-]+))?$", path)
+        start = date.fromisoformat(match.group(2))
+        end = date.fromisoformat(match.group(3)) if match.group(3) else start
+        return self.visual_crossing_days(unquote(match.group(1)), start, end)
+
+    def meteosource(self, query):
+        location = query.get("place_id") or f"{query.get('lat')},{query.get('lon')}"
+        payload = pick(self.fixtures["meteosource"], location)
+        today = date.today()
+        start = datetime(today.year, today.month, today.day)
+        for hour, item in enumerate(payload["hourly"]["data"]):
+            item["date"] = (start + timedelta(hours=hour)).isoformat()
+        return payload
+
+    def build_response(self, request, payload):
+        body = json.dumps(payload).encode("utf-8")
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json", "Content-Length": str(len(body))})
+        response.encoding = "utf-8"
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install(latency=0.0):
+    # Mount on every provider session created so far (import the modules first)
+    from providers import clients
+
+    adapter = FixtureAdapter(latency)
+    for client in clients.values():
+        client.session.mount("https://", adapter)
+        client.session.mount("http://", adapter)
+    return adapter
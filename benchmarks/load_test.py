@@ -0,0 +1,95 @@
+# Latency and throughput of server.py under concurrent keep-alive clients.
+# Run from the repo root with predictions.json present: python benchmarks/load_test.py
+# Pass --url to hit a server that is already running instead of starting one.
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers import percentile  # noqa: E402
+from server import make_server  # noqa: E402
+
+
+def client(host, port, paths, deadline, headers, latencies, statuses):
+    connection = http.client.HTTPConnection(host, port)
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+    connection.close()
+
+
+def run(host, port, paths, clients, seconds, headers):
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=client, args=(host, port, paths, deadline, headers, latencies, statuses))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the prediction server.")
+    parser.add_argument("--url", help="Base URL of a running server (default: start one in-process)")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        server, stop = make_server(port=0, quiet=True)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    connection = http.client.HTTPConnection(host, port)
+    connection.request("GET", "/predictions")
+    response = connection.getresponse()
+    slugs = list(json.loads(response.read()))
+    etag = response.getheader("ETag")
+    connection.close()
+    paths = ["/predictions"] + [f"/predictions/{slug}" for slug in slugs]
+
+    scenarios = [
+        ("identity", {}),
+        ("gzip", {"Accept-Encoding": "gzip"}),
+        ("304", {"If-None-Match": etag}),
+    ]
+    for label, headers in scenarios:
+        scenario_paths = ["/predictions"] if label == "304" else paths
+        latencies, statuses, elapsed = run(host, port, scenario_paths, args.clients, args.seconds, headers)
+        print(
+            f"{label:<8} {len(latencies) / elapsed:>8.0f} req/s  "
+            f"p50 {percentile(latencies, 50) * 1e3:.2f} ms  p99 {percentile(latencies, 99) * 1e3:.2f} ms  "
+            f"statuses {dict(sorted(statuses.items()))}"
+        )
+
+    if server is not None:
+        stop.set()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,137 @@
+# Writes the provider fixtures that benchmarks/fixture_transport.py replays.
+#
+# With API keys in the environment this records real Visual Crossing,
+# Meteosource and WeatherAPI responses for FIXTURE_CITIES. Without keys (or with
+# --synthetic) it writes deterministic synthetic responses in the same shape.
+# Each file says which it is in its "source" field; the fixtures checked in
+# under benchmarks/fixtures are synthetic, since no keys were available when
+# they were made. Run from the repo root: python benchmarks/record_fixtures.py
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_CITIES = ["san-francisco", "tokyo", "london", "banff"]
+METEOSOURCE_HOURS = 48
+
+
+def synthetic_visual_crossing(seed, day):
+    rnd = random.Random(f"visual_crossing-{seed}")
+    return {
+        "address": seed,
+        "days": [{
+            "datetime": day.isoformat(),
+            "sunrise": f"0{rnd.randint(5, 7)}:{rnd.randint(0, 59):02d}:00",
+            "sunset": f"{rnd.randint(17, 20)}:{rnd.randint(0, 59):02d}:00",
+            "cloudcover": round(rnd.uniform(0, 100), 1),
+            "visibility": round(rnd.uniform(2, 15), 1),
+            "hours": [
+                {
+                    "datetime": f"{hour:02d}:00:00",
+                    "cloudcover": round(rnd.uniform(0, 100), 1),
+                    "visibility": round(rnd.uniform(0.5, 15), 1),
+                }
+                for hour in range(24)
+            ],
+        }],
+    }
+
+
+def synthetic_meteosource(seed, day):
+    rnd = random.Random(f"meteosource-{seed}")
+    start = datetime(day.year, day.month, day.day)
+    return {
+        "lat": "0N",
+        "lon": "0E",
+        "elevation": rnd.randint(0, 1500),
+        "timezone": "UTC",
+        "units": "us",
+        "current": None,
+        "hourly": {
+            "data": [
+                {
+                    "date": (start + timedelta(hours=hour)).isoformat(),
+                    "weather": "partly_sunny",
+                    "icon": 4,
+                    "summary": "Partly sunny",
+                    "temperature": round(rnd.uniform(30, 90), 1),
+                    "wind": {"speed": round(rnd.uniform(0, 20), 1), "dir": "NW", "angle": rnd.randint(0, 359)},
+                    "cloud_cover": {"total": rnd.randint(0, 100)},
+                    "precipitation": {"total": 0.0, "type": "none"},
+                    "visibility": round(rnd.uniform(0.2, 10), 1),
+                }
+                for hour in range(METEOSOURCE_HOURS)
+            ]
+        },
+        "daily": None,
+    }
+
+
+def synthetic_weatherapi():
+    return {
+        "location": {"name": "San Francisco", "region": "California", "country": "USA", "tz_id": "America/Los_Angeles"},
+        "current": {"temp_f": 61.0, "temp_c": 16.1, "condition": {"text": "Partly cloudy", "code": 1003}},
+    }
+
+
+def record_live(day):
+    import requests
+
+    from generate_prediction import cities, fetch_meteosource_hours, meteosource_point, visual_crossing_url
+    from weather import API_KEY, LOCATION
+
+    by_slug = {city["slug"]: city for city in cities}
+    visual_crossing = []
+    meteosource = []
+    for slug in FIXTURE_CITIES:
+        city = by_slug[slug]
+        response = requests.get(visual_crossing_url(city, day), timeout=30)
+        response.raise_for_status()
+        visual_crossing.append(response.json())
+        point, _ = meteosource_point(city)
+        url = f"https://www.meteosource.com/api/v1/free/point?{point}&sections=hourly&timezone=auto&language=en&units=us&key={os.environ['METEOSOURCE_API_KEY']}"
+        meteosource.append(fetch_meteosource_hours(url, METEOSOURCE_HOURS))
+    response = requests.get(f"https://api.weatherapi.com/v1/current.json?key={API_KEY}&q={LOCATION}", timeout=30)
+    response.raise_for_status()
+    return visual_crossing, meteosource, [response.json()]
+
+
+def write_fixture(name, source, responses):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "source": source,
+            "recorded_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            "responses": responses,
+        }, f, indent=1)
+        f.write("\n")
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Record or synthesize provider fixtures for the benchmarks.")
+    parser.add_argument("--synthetic", action="store_true", help="Don't call the providers even if keys are set")
+    parser.add_argument("--date", type=date.fromisoformat, default=date(2025, 6, 21), help="Date stamped into synthetic fixtures")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    keys = all(os.environ.get(name) for name in ("VISUAL_CROSSING_API_KEY", "METEOSOURCE_API_KEY", "WEATHERAPI_KEY"))
+    if keys and not args.synthetic:
+        source = "recorded"
+        visual_crossing, meteosource, weatherapi = record_live(date.today())
+    else:
+        source = "synthetic"
+        visual_crossing = [synthetic_visual_crossing(slug, args.date) for slug in FIXTURE_CITIES]
+        meteosource = [synthetic_meteosource(slug, args.date) for slug in FIXTURE_CITIES]
+        weatherapi = [synthetic_weatherapi()]
+
+    for name, responses in (("visual_crossing", visual_crossing), ("meteosource", meteosource), ("weatherapi", weatherapi)):
+        print(f"✅ {write_fixture(name, source, responses)} ({source}, {len(responses)} responses)")
@@ -0,0 +1,78 @@
+# The list of cities, loaded from cities.json.
+#
+# Each city is a dict with slug, name, country, region, timezone, latitude and
+# longitude. The astral observer the astronomy code needs (city["observer"]) is
+# only built the first time it's read, so importing the registry or running a
+# subset of regions doesn't pay for every city.
+import json
+import math
+import os
+from functools import lru_cache
+
+import pytz
+from astral import Observer
+
+CITIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.json")
+FIELDS = ("slug", "name", "country", "region", "timezone", "latitude", "longitude")
+
+
+class City(dict):
+    def __missing__(self, key):
+        if key != "observer":
+            raise KeyError(key)
+        observer = self["observer"] = Observer(self["latitude"], self["longitude"])
+        return observer
+
+
+def validate(entry, index):
+    missing = [field for field in FIELDS if field not in entry]
+    if missing:
+        raise ValueError(f"City #{index} is missing {', '.join(missing)}")
+    if entry["timezone"] not in pytz.all_timezones_set:
+        raise ValueError(f"City {entry['slug']!r} has unknown timezone {entry['timezone']!r}")
+    latitude, longitude = entry["latitude"], entry["longitude"]
+    if not (isinstance(latitude, (int, float)) and isinstance(longitude, (int, float))) or math.isnan(latitude) or math.isnan(longitude):
+        raise ValueError(f"City {entry['slug']!r} has non-numeric coordinates")
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError(f"City {entry['slug']!r} has coordinates out of range: {latitude},{longitude}")
+
+
+class CityRegistry:
+    def __init__(self, entries):
+        self.cities = []
+        self.by_slug = {}
+        self.by_region = {}
+        self.by_timezone = {}
+        for index, entry in enumerate(entries):
+            validate(entry, index)
+            if entry["slug"] in self.by_slug:
+                raise ValueError(f"Duplicate city slug {entry['slug']!r}")
+            city = City(entry)
+            self.cities.append(city)
+            self.by_slug[city["slug"]] = city
+            self.by_region.setdefault(city["region"], []).append(city)
+            self.by_timezone.setdefault(city["timezone"], []).append(city)
+
+    def get(self, slug):
+        return self.by_slug.get(slug)
+
+    def regions(self):
+        return sorted(self.by_region)
+
+    def select(self, regions=None, slugs=None):
+        # Cities in file order that match any of the regions or slugs (all when neither is given)
+        if not regions and not slugs:
+            return list(self.cities)
+        unknown = [region for region in regions or [] if region not in self.by_region]
+        unknown += [slug for slug in slugs or [] if slug not in self.by_slug]
+        if unknown:
+            raise ValueError(f"Unknown region or city: {', '.join(unknown)} (regions: {', '.join(self.regions())})")
+        wanted_regions = set(regions or [])
+        wanted_slugs = set(slugs or [])
+        return [city for city in self.cities if city["region"] in wanted_regions or city["slug"] in wanted_slugs]
+
+
+@lru_cache(maxsize=None)
+def load_registry(path=CITIES_PATH):
+    with open(path) as f:
+        return CityRegistry(json.load(f))
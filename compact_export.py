@@ -0,0 +1,122 @@
+# Compact exports of predictions.json for high-volume consumers.
+#
+# predictions.min.json is the same document without indentation.
+#
+# predictions.bin is a columnar, little-endian layout with numeric values only:
+#
+#   header    "<4sHHiI"  magic b"SSPB", FORMAT_VERSION, city count N,
+#                        day (days since 1970-01-01), string table length S
+#   strings   S bytes    UTF-8 "slug\tname\n" per city, in column order
+#   columns   one after another, N values each, in COLUMNS order
+#
+# Event times are int32 seconds from 00:00 UTC of `day` (MISSING_TIME when the
+# event doesn't happen), so an absolute time is day * 86400 + value. Cities
+# kept from an earlier run (--city, --region, --schedule) carry the events of
+# their own date, still offset from `day`. day_length
+# is int32 seconds (MISSING_TIME when unknown), scores are int8 (MISSING_SCORE
+# when unknown), float32 columns use NaN for unknown, and updated_at is int64
+# epoch seconds.
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+from datetime import date, datetime
+
+from shards import atomic_write
+
+FORMAT_VERSION = 1
+MAGIC = b"SSPB"
+HEADER = struct.Struct("<4sHHiI")
+MISSING_TIME = -(2 ** 31)
+MISSING_SCORE = -1
+
+TIME_FIELDS = [
+    ("sunrise", "sunrise"),
+    ("sunset", "sunset"),
+    ("solar_noon", "noon"),
+    ("civil_twilight_begin", "civil_dawn"),
+    ("civil_twilight_end", "civil_dusk"),
+    ("nautical_twilight_begin", "nautical_dawn"),
+    ("nautical_twilight_end", "nautical_dusk"),
+    ("astronomical_twilight_begin", "astronomical_dawn"),
+    ("astronomical_twilight_end", "astronomical_dusk"),
+    ("moonrise", "moonrise"),
+    ("moonset", "moonset"),
+]
+
+# (column name, array typecode)
+COLUMNS = [(name, "i") for name, _ in TIME_FIELDS] + [
+    ("day_length", "i"),
+    ("sunrise_score", "b"),
+    ("sunset_score", "b"),
+    ("moon_phase", "f"),
+    ("recommended_fog_score", "f"),
+    ("updated_at", "q"),
+]
+
+
+def score_or_missing(value):
+    return MISSING_SCORE if value is None else int(value)
+
+
+def float_or_nan(value):
+    return math.nan if value is None else float(value)
+
+
+def encode_binary(predictions, names, events_by_slug, day):
+    day_start = (day - date(1970, 1, 1)).days
+    base = day_start * 86400
+    slugs = list(predictions)
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+
+    for slug in slugs:
+        entry = predictions[slug]
+        events = events_by_slug[slug]
+        for name, event in TIME_FIELDS:
+            value = events.get(event)
+            columns[name].append(MISSING_TIME if value is None else int(value.timestamp()) - base)
+        columns["day_length"].append(MISSING_TIME if entry.get("day_length") is None else entry["day_length"])
+        columns["sunrise_score"].append(score_or_missing(entry.get("sunrise_score")))
+        columns["sunset_score"].append(score_or_missing(entry.get("sunset_score")))
+        columns["moon_phase"].append(float_or_nan((entry.get("moon_phase") or {}).get("value")))
+        columns["recommended_fog_score"].append(float_or_nan((entry.get("recommended_shoot_time") or {}).get("fog_score")))
+        columns["updated_at"].append(int(datetime.fromisoformat(entry["updated_at"]).timestamp()))
+
+    strings = "".join(f"{slug}\t{names.get(slug, slug)}\n" for slug in slugs).encode("utf-8")
+    body = [HEADER.pack(MAGIC, FORMAT_VERSION, len(slugs), day_start, len(strings)), strings]
+    for name, _ in COLUMNS:
+        column = columns[name]
+        if column.itemsize > 1 and sys.byteorder == "big":
+            column.byteswap()
+        body.append(column.tobytes())
+    return b"".join(body)
+
+
+def decode_binary(body):
+    # Returns (day, [(slug, name)], {column: array}); columns stay columnar
+    magic, version, count, day, strings_length = HEADER.unpack_from(body, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} predictions.bin file")
+    offset = HEADER.size
+    lines = body[offset:offset + strings_length].decode("utf-8").splitlines()
+    cities = [tuple(line.split("\t", 1)) for line in lines]
+    offset += strings_length
+
+    columns = {}
+    for name, typecode in COLUMNS:
+        column = array(typecode)
+        size = column.itemsize * count
+        column.frombytes(body[offset:offset + size])
+        if column.itemsize > 1 and sys.byteorder == "big":
+            column.byteswap()
+        columns[name] = column
+        offset += size
+    return day, cities, columns
+
+
+def write_compact_exports(predictions, names, events_by_slug, day, directory="."):
+    minified = json.dumps(predictions, separators=(",", ":")).encode("utf-8")
+    atomic_write(os.path.join(directory, "predictions.min.json"), minified)
+    atomic_write(os.path.join(directory, "predictions.bin"), encode_binary(predictions, names, events_by_slug, day))
@@ -0,0 +1,145 @@
+# Hourly cloud cover and visibility for one city, whichever provider they came
+# from.
+#
+# Visual Crossing's timeline (fetched for the scores anyway) and Meteosource's
+# hourly forecast carry the same two fields per hour in different shapes. Both
+# are normalized into HourlyConditions: parallel lists of hour starts (naive,
+# local to the city), cloud cover in percent and visibility in miles
+# (unitGroup=us / units=us), with None where the provider left a gap. Scoring,
+# the fog forecast and the twilight analysis all read from it, so a city needs
+# one provider response instead of two.
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+
+class HourlyConditions:
+    def __init__(self, source, hours=(), cloud_cover=(), visibility=()):
+        self.source = source
+        self.hours = list(hours)
+        self.cloud_cover = list(cloud_cover)
+        self.visibility = list(visibility)
+        # tz name -> fog timeline, filled in by generate_prediction.fog_timeline()
+        self.timelines = {}
+
+    def __len__(self):
+        return len(self.hours)
+
+    def index(self, hour_start):
+        # Position of the hour starting at hour_start, or None
+        position = bisect_left(self.hours, hour_start)
+        if position < len(self.hours) and self.hours[position] == hour_start:
+            return position
+        return None
+
+    def first_from(self, start):
+        # Position of the first hour starting at or after the hour holding start
+        return bisect_left(self.hours, start.replace(minute=0, second=0, microsecond=0))
+
+    def missing(self, start, count):
+        # Hours of the count from start's hour on with no reading (or no cloud cover)
+        start = start.replace(minute=0, second=0, microsecond=0)
+        gaps = 0
+        for offset in range(count):
+            position = self.index(start + timedelta(hours=offset))
+            if position is None or self.cloud_cover[position] is None:
+                gaps += 1
+        return gaps
+
+    def between(self, start, end):
+        # The hours starting in [start, end)
+        first = bisect_left(self.hours, start)
+        last = bisect_left(self.hours, end)
+        return HourlyConditions(
+            self.source, self.hours[first:last], self.cloud_cover[first:last], self.visibility[first:last]
+        )
+
+    def fill(self, other):
+        # Hours or values missing here taken from other; returns (conditions, hours filled)
+        readings = {
+            hour: [cloud, visibility]
+            for hour, cloud, visibility in zip(self.hours, self.cloud_cover, self.visibility)
+        }
+        filled = 0
+        for hour, cloud, visibility in zip(other.hours, other.cloud_cover, other.visibility):
+            reading = readings.get(hour)
+            if reading is None:
+                readings[hour] = [cloud, visibility]
+                filled += 1
+            elif (reading[0] is None and cloud is not None) or (reading[1] is None and visibility is not None):
+                reading[0] = cloud if reading[0] is None else reading[0]
+                reading[1] = visibility if reading[1] is None else reading[1]
+                filled += 1
+        if not filled:
+            return self, 0
+        hours = sorted(readings)
+        return HourlyConditions(
+            f"{self.source}+{other.source}",
+            hours,
+            [readings[hour][0] for hour in hours],
+            [readings[hour][1] for hour in hours],
+        ), filled
+
+    def compare(self, other):
+        # Mean absolute difference over the hours both have a reading for
+        cloud_diffs = []
+        visibility_diffs = []
+        for position, hour in enumerate(other.hours):
+            mine = self.index(hour)
+            if mine is None:
+                continue
+            if self.cloud_cover[mine] is not None and other.cloud_cover[position] is not None:
+                cloud_diffs.append(abs(self.cloud_cover[mine] - other.cloud_cover[position]))
+            if self.visibility[mine] is not None and other.visibility[position] is not None:
+                visibility_diffs.append(abs(self.visibility[mine] - other.visibility[position]))
+        return {
+            "cloud_cover_hours": len(cloud_diffs),
+            "visibility_hours": len(visibility_diffs),
+            "cloud_cover_mad": round(sum(cloud_diffs) / len(cloud_diffs), 2) if cloud_diffs else None,
+            "visibility_mad": round(sum(visibility_diffs) / len(visibility_diffs), 2) if visibility_diffs else None,
+        }
+
+    def as_dict(self):
+        return {
+            "hours": [hour.isoformat() for hour in self.hours],
+            "cloud_cover": self.cloud_cover,
+            "visibility": self.visibility,
+        }
+
+
+def from_readings(source, readings):
+    # readings: (hour start, cloud cover, visibility) in any order; the first
+    # reading wins for a repeated hour (the doubled hour when clocks go back)
+    hours = []
+    cloud_cover = []
+    visibility = []
+    seen = set()
+    for hour, cloud, vis in sorted(readings, key=lambda reading: reading[0]):
+        if hour in seen:
+            continue
+        seen.add(hour)
+        hours.append(hour)
+        cloud_cover.append(cloud)
+        visibility.append(vis)
+    return HourlyConditions(source, hours, cloud_cover, visibility)
+
+
+def from_visual_crossing(data):
+    readings = []
+    for day_data in data.get("days", []):
+        for hour in day_data.get("hours", []):
+            hour_start = datetime.fromisoformat(f"{day_data['datetime']}T{hour['datetime']}")
+            readings.append((hour_start, hour.get("cloudcover"), hour.get("visibility")))
+    return from_readings("visual_crossing", readings)
+
+
+def from_meteosource(data):
+    readings = []
+    for hour in data.get("hourly", {}).get("data", []):
+        if not hour.get("date"):
+            continue
+        hour_start = datetime.fromisoformat(hour["date"]).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+        cloud = hour.get("cloud_cover")
+        if isinstance(cloud, dict):
+            cloud = cloud.get("total")
+        readings.append((hour_start, cloud, hour.get("visibility")))
+    return from_readings("meteosource", readings)
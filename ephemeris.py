@@ -0,0 +1,151 @@
+# Precomputed sun and moon times for every city over a date range.
+#
+# The table is a plain .npy array of epoch seconds, shape (cities, days,
+# fields), opened with mmap so a lookup touches one row of one page instead of
+# loading the file. A small JSON header maps slugs to rows and records each
+# city's coordinates, so a moved or new city falls back to live astral math
+# instead of reading someone else's row.
+import argparse
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from solar import moon_events
+from solar_vector import EVENT_NAMES, city_table, date_range
+
+EPHEMERIS_DIR = os.environ.get("EPHEMERIS_DIR", os.path.join(".cache", "ephemeris"))
+FIELDS = EVENT_NAMES + ["moonrise", "moonset"]
+MISSING = np.iinfo(np.int64).min
+DEFAULT_DAYS = 366
+# --ensure rebuilds when the table doesn't reach this far past today
+MIN_DAYS_AHEAD = 16
+
+lock = threading.Lock()
+loaded = {}
+
+
+def table_paths(directory=EPHEMERIS_DIR):
+    return os.path.join(directory, "ephemeris.npy"), os.path.join(directory, "ephemeris.json")
+
+
+def build_ephemeris(cities, start, days, directory=EPHEMERIS_DIR):
+    dates = date_range(start, days)
+    sun_table = city_table(cities, dates)
+
+    table = np.full((len(cities), days, len(FIELDS)), MISSING, dtype=np.int64)
+    for field_index, name in enumerate(EVENT_NAMES):
+        values = sun_table[name]
+        table[:, :, field_index] = np.where(np.isnan(values), MISSING, np.floor(np.nan_to_num(values)))
+
+    rise_index = FIELDS.index("moonrise")
+    for row, city in enumerate(cities):
+        for col, day in enumerate(dates):
+            for offset, event in enumerate(moon_events(city["observer"], day)):
+                if event is not None:
+                    table[row, col, rise_index + offset] = int(event.timestamp())
+
+    header = {
+        "start": start.isoformat(),
+        "days": days,
+        "fields": FIELDS,
+        "cities": {
+            city["slug"]: {
+                "row": row,
+                "latitude": city["observer"].latitude,
+                "longitude": city["observer"].longitude,
+            }
+            for row, city in enumerate(cities)
+        },
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    table_path, header_path = table_paths(directory)
+    # Write to temp names first so a concurrent reader never sees half a table
+    np.save(f"{table_path}.tmp.npy", table)
+    with open(f"{header_path}.tmp", "w") as f:
+        json.dump(header, f, indent=2)
+    os.replace(f"{table_path}.tmp.npy", table_path)
+    os.replace(f"{header_path}.tmp", header_path)
+
+    with lock:
+        loaded.pop(directory, None)
+    return table_path
+
+
+def load_ephemeris(directory=EPHEMERIS_DIR):
+    with lock:
+        if directory not in loaded:
+            table_path, header_path = table_paths(directory)
+            try:
+                with open(header_path) as f:
+                    header = json.load(f)
+                table = np.load(table_path, mmap_mode="r")
+            except (OSError, ValueError):
+                header, table = None, None
+            else:
+                header["start"] = date.fromisoformat(header["start"])
+            loaded[directory] = (header, table)
+        return loaded[directory]
+
+
+def lookup(city, day, tz, directory=EPHEMERIS_DIR):
+    # Sun and moon events for one city/date as datetimes in tz, or None when the
+    # table doesn't cover them
+    header, table = load_ephemeris(directory)
+    if header is None:
+        return None
+
+    entry = header["cities"].get(city["slug"])
+    col = (day - header["start"]).days
+    if entry is None or not 0 <= col < header["days"]:
+        return None
+    observer = city["observer"]
+    if entry["latitude"] != observer.latitude or entry["longitude"] != observer.longitude:
+        return None
+
+    values = table[entry["row"], col].tolist()
+    events = {
+        name: None if value == MISSING else datetime.fromtimestamp(int(value), tz)
+        for name, value in zip(header["fields"], values)
+    }
+    events["dawn"] = events["civil_dawn"]
+    events["dusk"] = events["civil_dusk"]
+    return events
+
+
+def is_current(cities, today, directory=EPHEMERIS_DIR):
+    header, _ = load_ephemeris(directory)
+    if header is None:
+        return False
+    end = header["start"] + timedelta(days=header["days"])
+    if not header["start"] <= today or today + timedelta(days=MIN_DAYS_AHEAD) > end:
+        return False
+    for city in cities:
+        entry = header["cities"].get(city["slug"])
+        if entry is None or (entry["latitude"], entry["longitude"]) != (city["observer"].latitude, city["observer"].longitude):
+            return False
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute the sun/moon ephemeris table for every city.")
+    # Cities west of UTC are still on yesterday's date for part of the day
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today() - timedelta(days=1), help="First date (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Number of days to cover")
+    parser.add_argument("--output", default=EPHEMERIS_DIR, help="Directory for ephemeris.npy/ephemeris.json")
+    parser.add_argument("--ensure", action="store_true", help="Only rebuild when the table is missing or out of date")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from generate_prediction import cities
+
+    args = parse_args()
+    if args.ensure and is_current(cities, date.today() - timedelta(days=1), args.output):
+        print("✅ ephemeris table is current")
+    else:
+        path = build_ephemeris(cities, args.start, args.days, args.output)
+        print(f"✅ {path} built: {len(cities)} cities x {args.days} days from {args.start}")
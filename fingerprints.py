@@ -0,0 +1,47 @@
+# Input fingerprints for incremental regeneration: a city whose date,
+# coordinates, provider payloads and scoring version all match the previous
+# run would produce the same entry, so the previous one can be kept.
+import hashlib
+import json
+import os
+
+FINGERPRINTS_PATH = os.environ.get("FINGERPRINTS_PATH", os.path.join(".cache", "fingerprints.json"))
+
+
+def payload_hash(payload):
+    if payload is None or isinstance(payload, Exception):
+        return None
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def city_fingerprint(city, day, scoring_version, payloads):
+    # None when any provider failed: fallback scores are never worth reusing
+    hashes = [payload_hash(payload) for payload in payloads]
+    if None in hashes:
+        return None
+    observer = city["observer"]
+    key = json.dumps({
+        "date": day.isoformat(),
+        "latitude": observer.latitude,
+        "longitude": observer.longitude,
+        "timezone": city["timezone"],
+        "scoring_version": scoring_version,
+        "payloads": hashes,
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def load_fingerprints(path=FINGERPRINTS_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_fingerprints(fingerprints, path=FINGERPRINTS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
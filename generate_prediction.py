@@ -1,12 +1,29 @@
-import requests
 from datetime import datetime, timedelta, date
 import pytz
 import json
 import os
-from astral import LocationInfo
-from astral.sun import sun
-from astral.moon import moonrise, moonset, phase as moon_phase_value
+import argparse
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 from urllib.parse import quote
+from providers import ProviderClient, percentile, print_provider_summary, provider_summaries, quota_summaries
+import rate_limit
+import response_cache
+import telemetry
+from telemetry import span
+from stream_json import ArrayPrefixReader
+from fingerprints import city_fingerprint, load_fingerprints, save_fingerprints
+from shards import SHARD_DIR, atomic_write, write_shards
+from compact_export import write_compact_exports
+from archive import ARCHIVE_PATH, append_run
+from solar import moon_events, solar_events
+import ephemeris
+from conditions import from_meteosource, from_visual_crossing
+import scheduler
+from city_registry import load_registry
+from moon_phase import moon_phase_for
 
 
 # Only load .env file if present
@@ -17,399 +34,454 @@ if os.path.exists(".env"):
 VISUAL_CROSSING_API_KEY = os.environ.get("VISUAL_CROSSING_API_KEY")
 METEOSOURCE_API_KEY = os.environ.get("METEOSOURCE_API_KEY")
 
-# List of cities with coordinates and timezone
-cities = [
-    {
-        "slug": "los-angeles",
-        "name": "Los Angeles",
-        "timezone": "America/Los_Angeles",
-        "observer": LocationInfo("Los Angeles", "USA", "America/Los_Angeles", 34.0522, -118.2437).observer
-    },
-    {
-        "slug": "palm-springs",
-        "name": "Palm Springs",
-        "timezone": "America/Los_Angeles",
-        "observer": LocationInfo("Palm Springs", "USA", "America/Los_Angeles", 33.8303, -116.5453).observer
-    },
-    {
-        "slug": "san-francisco",
-        "name": "San Francisco",
-        "timezone": "America/Los_Angeles",
-        "observer": LocationInfo("San Francisco", "USA", "America/Los_Angeles", 37.7749, -122.4194).observer
-    },
-    {
-        "slug": "san-diego",
-        "name": "San Diego",
-        "timezone": "America/Los_Angeles",
-        "observer": LocationInfo("San Diego", "USA", "America/Los_Angeles", 32.7157, -117.1611).observer
-    },
-    {
-        "slug": "lake-tahoe",
-        "name": "Lake Tahoe",
-        "timezone": "America/Los_Angeles",
-        "observer": LocationInfo("Lake Tahoe", "USA", "America/Los_Angeles", 39.0968, -120.0324).observer
-    },
-    {
-        "slug": "truckee",
-        "name": "Truckee",
-        "timezone": "America/Los_Angeles",
-        "observer": LocationInfo("Truckee", "USA", "America/Los_Angeles", 39.327962, -120.183253).observer
-    },
-    {
-        "slug": "tokyo",
-        "name": "Tokyo",
-        "timezone": "Asia/Tokyo",
-        "observer": LocationInfo("Tokyo", "Japan", "Asia/Tokyo", 35.6895, 139.6917).observer
-    },
-    {
-        "slug": "london",
-        "name": "London",
-        "timezone": "Europe/London",
-        "observer": LocationInfo("London", "United Kingdom", "Europe/London", 51.5074, -0.1278).observer
-    },
-    {
-        "slug": "paris",
-        "name": "Paris",
-        "timezone": "Europe/Paris",
-        "observer": LocationInfo("Paris", "France", "Europe/Paris", 48.8566, 2.3522).observer
-    },
-    {
-        "slug": "lake-como",
-        "name": "Lake Como",
-        "timezone": "Europe/Rome",
-        "observer": LocationInfo("Lake Como", "Italy", "Europe/Rome", 45.9911, 9.2572).observer
-    },
-    {
-        "slug": "milan",
-        "name": "Milan",
-        "timezone": "Europe/Rome",
-        "observer": LocationInfo("Milan", "Italy", "Europe/Rome", 45.4642, 9.1900).observer
-    },
-    {
-        "slug": "rome",
-        "name": "Rome",
-        "timezone": "Europe/Rome",
-        "observer": LocationInfo("Rome", "Italy", "Europe/Rome", 41.9028, 12.4964).observer
-    },
-    {
-        "slug": "new-york-city",
-        "name": "New York City",
-        "timezone": "America/New_York",
-        "observer": LocationInfo("New York City", "USA", "America/New_York", 40.7128, -74.0060).observer
-    },
-    {
-        "slug": "toronto",
-        "name": "Toronto",
-        "timezone": "America/Toronto",
-        "observer": LocationInfo("Toronto", "Canada", "America/Toronto", 43.6532, -79.3832).observer
-    },
-    {
-        "slug": "chicago",
-        "name": "Chicago",
-        "timezone": "America/Chicago",
-        "observer": LocationInfo("Chicago", "USA", "America/Chicago", 41.8781, -87.6298).observer
-    },
-    {
-        "slug": "montreal",
-        "name": "Montreal",
-        "timezone": "America/Toronto",
-        "observer": LocationInfo(
-            "Montreal", "Canada", "America/Toronto",
-            45.5017, -73.5673
-        ).observer
-    },
-    {
-            "slug": "vancouver",
-            "name": "Vancouver",
-            "timezone": "America/Vancouver",
-            "observer": LocationInfo(
-                "Vancouver", "Canada", "America/Vancouver",
-                49.2827, -123.1207
-            ).observer
-        },
-        {
-            "slug": "victoria",
-            "name": "Victoria",
-            "timezone": "America/Vancouver",
-            "observer": LocationInfo(
-                "Victoria", "Canada", "America/Vancouver",
-                48.4284, -123.3656
-            ).observer
-        },
-        {
-            "slug": "calgary",
-            "name": "Calgary",
-            "timezone": "America/Edmonton",
-            "observer": LocationInfo(
-                "Calgary", "Canada", "America/Edmonton",
-                51.0447, -114.0719
-            ).observer
-        },
-        {
-            "slug": "banff",
-            "name": "Banff",
-            "timezone": "America/Edmonton",
-            "observer": LocationInfo(
-                "Banff", "Canada", "America/Edmonton",
-                51.1784, -115.5708
-            ).observer
-        },
-        {
-                "slug": "miami",
-                "name": "Miami",
-                "timezone": "America/New_York",
-                "observer": LocationInfo(
-                    "Miami", "USA", "America/New_York",
-                    25.7617, -80.1918
-                ).observer
-            },
-            {
-                "slug": "orlando",
-                "name": "Orlando",
-                "timezone": "America/New_York",
-                "observer": LocationInfo(
-                    "Orlando", "USA", "America/New_York",
-                    28.5383, -81.3792
-                ).observer
-            },
-            {
-                "slug": "atlanta",
-                "name": "Atlanta",
-                "timezone": "America/New_York",
-                "observer": LocationInfo(
-                    "Atlanta", "USA", "America/New_York",
-                    33.7490, -84.3880
-                ).observer
-            },
-            {
-                "slug": "washington-dc",
-                "name": "Washington, D.C.",
-                "timezone": "America/New_York",
-                "observer": LocationInfo(
-                    "Washington, D.C.", "USA", "America/New_York",
-                    38.9072, -77.0369
-                ).observer
-            },
-            {
-                "slug": "philadelphia",
-                "name": "Philadelphia",
-                "timezone": "America/New_York",
-                "observer": LocationInfo(
-                    "Philadelphia", "USA", "America/New_York",
-                    39.9526, -75.1652
-                ).observer
-            },
-            {
-                "slug": "boston",
-                "name": "Boston",
-                "timezone": "America/New_York",
-                "observer": LocationInfo(
-                    "Boston", "USA", "America/New_York",
-                    42.3601, -71.0589
-                ).observer
-            }
-]
+# Upper bound on in-flight requests per provider when running with --workers > 1
+PROVIDER_CONCURRENCY = {
+    "visual_crossing": int(os.environ.get("VISUAL_CROSSING_MAX_CONCURRENCY", "4")),
+    "meteosource": int(os.environ.get("METEOSOURCE_MAX_CONCURRENCY", "2")),
+}
+visual_crossing_client = ProviderClient("visual_crossing", PROVIDER_CONCURRENCY["visual_crossing"])
+meteosource_client = ProviderClient("meteosource", PROVIDER_CONCURRENCY["meteosource"])
+
+# Locations per Visual Crossing timelinemulti request; 1 sends one request per city
+VISUAL_CROSSING_BATCH_SIZE = max(1, int(os.environ.get("VISUAL_CROSSING_BATCH_SIZE", "10")))
+# Only the fields the hourly conditions read; everything else is dropped server-side
+VISUAL_CROSSING_ELEMENTS = "datetime,cloudcover,visibility"
+# Meteosource hours kept for the fog forecast
+FOG_FORECAST_HOURS = 12
+# Longest wait for a Meteosource answer once the request has gone out, hedged
+# requests included (rate limit waits come on top)
+FOG_DEADLINE = float(os.environ.get("FOG_DEADLINE_SECONDS", "8"))
+# The hourly conditions come from the Visual Crossing response the scores
+# need anyway; Meteosource is only asked to fill gaps in it ("fill"), to fill
+# and cross-check every city ("check"), or never ("off")
+METEOSOURCE_MODES = ("off", "fill", "check")
+METEOSOURCE_MODE = os.environ.get("METEOSOURCE_MODE", "fill")
+# Longest --days horizon; Visual Crossing forecasts 15 days ahead
+MAX_FORECAST_DAYS = 15
+
+# Bump whenever scoring, fog or twilight logic changes so --incremental
+# recomputes every city instead of keeping entries made by the old code
+SCORING_VERSION = 3
+
+# Machine-readable timings and counters for each run, next to predictions.json
+RUN_REPORT_PATH = "run_report.json"
+RUN_REPORT_PROMETHEUS_PATH = "run_report.prom"
+
+# Every city, in output order, from cities.json
+registry = load_registry()
+cities = registry.cities
 
 def format_time(dt, tz):
     if dt is None:
         return None
     return dt.astimezone(tz).strftime("%-I:%M %p")
 
-def get_moon_info(observer, tz):
-    today = date.today()
-    try:
-        rise = moonrise(observer, date=today)
-        set_ = moonset(observer, date=today)
-        return {
-            "moonrise": format_time(rise, tz) if rise else None,
-            "moonset": format_time(set_, tz) if set_ else None
-        }
-    except Exception as e:
-        print(f"⚠️ Error computing moon info: {e}")
-        return {"moonrise": None, "moonset": None}
-
-def get_city_data(city):
-    today = date.today()
+def get_astronomy(city, day, tz):
+    # O(1) read from the precomputed table, live astral math outside its range
+    events = ephemeris.lookup(city, day, tz)
+    if events is None:
+        events = solar_events(city["observer"], day, tz)
+        events["moonrise"], events["moonset"] = moon_events(city["observer"], day)
+    return events
+
+def city_events(city, day):
+    return get_astronomy(city, day, pytz.timezone(city["timezone"]))
+
+def local_date(city, now):
+    # The city's own date at now. A run builds each city's entry for it, so
+    # the entry's sunrise and sunset are the city's next or latest ones, not
+    # ones on the runner's date that may already be a day away locally.
+    return now.astimezone(pytz.timezone(city["timezone"])).date()
+
+def get_city_data(city, updated_at=None, conditions=None, day=None, now=None):
+    # conditions: the city's HourlyConditions (or the error that stood in
+    # for them), fetched when not given
+    today = day or date.today()
     tz = pytz.timezone(city["timezone"])
-    observer = city["observer"]
-
-    loc = LocationInfo(city["name"], "USA", city["timezone"], observer.latitude, observer.longitude)
-
-    s = sun(observer, date=today, tzinfo=tz)
+    slug = city["slug"]
 
-    loc.depression = "civil"
-    s_civil = sun(observer, date=today, tzinfo=tz)
+    with span("astronomy", city=slug):
+        events = get_astronomy(city, today, tz)
 
-    loc.depression = "nautical"
-    s_nautical = sun(observer, date=today, tzinfo=tz)
+    if conditions is None:
+        conditions, _ = hourly_conditions(city, today, now)
+    with span("scoring", city=slug):
+        scores = get_prediction_scores(city, conditions, events)
+    with span("fog", city=slug):
+        fog = get_fog_forecast(city, conditions, forecast_start(city, today, now))
+    with span("twilight", city=slug):
+        twilight, best_time, summary = analyze_twilight_conditions(events, conditions, tz)
 
-    loc.depression = "astronomical"
-    s_astro = sun(observer, date=today, tzinfo=tz)
-
-    moon_times = get_moon_info(observer, tz)
-    scores = get_prediction_scores(city["name"], moon_times)
-    fog = get_fog_forecast(city["slug"])
-    twilight, best_time, summary = analyze_twilight_conditions(s_civil, fog)
+    # Whole seconds, so live astral times and the ephemeris table agree
+    day_length = None
+    if events["sunrise"] and events["sunset"]:
+        day_length = int(events["sunset"].timestamp()) - int(events["sunrise"].timestamp())
 
     return city["slug"], {
-        "sunrise": format_time(s["sunrise"], tz),
-        "sunset": format_time(s["sunset"], tz),
-        "solar_noon": format_time(s["noon"], tz),
-        "civil_twilight_begin": format_time(s_civil["dawn"], tz),
-        "civil_twilight_end": format_time(s_civil["dusk"], tz),
-        "nautical_twilight_begin": format_time(s_nautical["dawn"], tz),
-        "nautical_twilight_end": format_time(s_nautical["dusk"], tz),
-        "astronomical_twilight_begin": format_time(s_astro["dawn"], tz),
-        "astronomical_twilight_end": format_time(s_astro["dusk"], tz),
-        "day_length": int((s["sunset"] - s["sunrise"]).total_seconds()),
+        "sunrise": format_time(events["sunrise"], tz),
+        "sunset": format_time(events["sunset"], tz),
+        "solar_noon": format_time(events["noon"], tz),
+        "civil_twilight_begin": format_time(events["civil_dawn"], tz),
+        "civil_twilight_end": format_time(events["civil_dusk"], tz),
+        "nautical_twilight_begin": format_time(events["nautical_dawn"], tz),
+        "nautical_twilight_end": format_time(events["nautical_dusk"], tz),
+        "astronomical_twilight_begin": format_time(events["astronomical_dawn"], tz),
+        "astronomical_twilight_end": format_time(events["astronomical_dusk"], tz),
+        "day_length": day_length,
         "sunrise_score": scores["sunrise_score"],
         "sunset_score": scores["sunset_score"],
-        "moon_phase": scores["moon_phase"],
+        "moon_phase": {
+            **moon_phase_for(today),
+            "moonrise": format_time(events["moonrise"], tz),
+            "moonset": format_time(events["moonset"], tz)
+        },
         "fog_forecast": fog,
         "twilight_phases": twilight,
         "recommended_shoot_time": best_time,
         "summary_text": summary,
-        "updated_at": datetime.now(pytz.utc).isoformat()
+        "updated_at": updated_at or datetime.now(pytz.utc).isoformat()
     }
 
-def get_prediction_scores(city_name, moon_data):
-    API_KEY = VISUAL_CROSSING_API_KEY
-    city_query = city_name.replace(" ", "%20").lower()
-    safe_city_name = quote(f"{city_name}, CA")
-    url = f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/{safe_city_name}/today?unitGroup=us&include=days,hours,astronomy&key={API_KEY}&contentType=json"
-
-    try:
-        response = requests.get(url, timeout=10)
+def fetch_provider_json(client, url, cost=1):
+    response = client.get(url, timeout=10, cost=cost)
+    response.raise_for_status()
+    started = time.perf_counter()
+    data = response.json()
+    client.record_parse(time.perf_counter() - started)
+    return data
+
+def fetch_meteosource_hours(url, hours=FOG_FORECAST_HOURS, sent=None, hedge=False, cancel=None):
+    # Stream the body and stop once the hours we use have been decoded
+    with meteosource_client.get(url, timeout=10, stream=True, sent=sent, hedge=hedge, cancel=cancel) as response:
         response.raise_for_status()
-        data = response.json()
-
-        hours = data["days"][0]["hours"]
-        sunrise_time = data["days"][0]["sunrise"]
-        sunset_time = data["days"][0]["sunset"]
-        sunrise_hour = int(sunrise_time.split(":")[0])
-        sunset_hour = int(sunset_time.split(":")[0])
-
-        def find_hour_score(hour_data):
-            cloud = hour_data.get("cloudcover", 100)
-            vis = hour_data.get("visibility", 0)
-            cloud_score = max(0, 10 - abs(cloud - 45) / 5)
-            vis_score = min(vis / 10, 1.0) * 10
-            return int((cloud_score * 0.7 + vis_score * 0.3))
-
-        sunrise_score = 0
-        sunset_score = 0
-
-        for hour in hours:
-            hour_str = hour["datetime"]
-            hour_val = int(hour_str.split(":")[0])
-            if hour_val == sunrise_hour:
-                sunrise_score = find_hour_score(hour)
-            elif hour_val == sunset_hour:
-                sunset_score = find_hour_score(hour)
-
-        moon_val = moon_phase_value()
-        moon_label = get_moon_phase_label(moon_val)
+        reader = ArrayPrefixReader(response.iter_content(chunk_size=4096))
+        data = reader.read_array(["hourly", "data"], hours)
+    meteosource_client.record_transfer(reader.bytes_read, reader.parse_seconds)
+    return {"hourly": {"data": data}}
 
-        return {
-            "sunrise_score": sunrise_score,
-            "sunset_score": sunset_score,
-            "moon_phase": {
-                "value": round(moon_val, 2),
-                "label": moon_label,
-                "moonrise": moon_data.get("moonrise"),
-                "moonset": moon_data.get("moonset")
-            }
-        }
+def visual_crossing_location(city):
+    observer = city["observer"]
+    return f"{observer.latitude},{observer.longitude}"
+
+def visual_crossing_cache_key(city, days=1):
+    # Multi-day responses are cached apart from the single-day ones
+    location = visual_crossing_location(city)
+    return location if days == 1 else f"{location}|{days}d"
+
+def visual_crossing_url(city, day, days=1):
+    location = quote(visual_crossing_location(city))
+    dates = day.isoformat()
+    if days > 1:
+        dates += f"/{(day + timedelta(days=days - 1)).isoformat()}"
+    return f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/{location}/{dates}?unitGroup=us&include=days,hours&elements={VISUAL_CROSSING_ELEMENTS}&key={VISUAL_CROSSING_API_KEY}&contentType=json"
+
+def visual_crossing_batch_url(batch, day, days=1):
+    locations = quote("|".join(visual_crossing_location(city) for city in batch))
+    end = day + timedelta(days=days - 1)
+    return f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timelinemulti?locations={locations}&datestart={day.isoformat()}&dateend={end.isoformat()}&unitGroup=us&include=days,hours&elements={VISUAL_CROSSING_ELEMENTS}&key={VISUAL_CROSSING_API_KEY}&contentType=json"
+
+def fetch_visual_crossing(city, day, check_cache=True, days=1):
+    url = visual_crossing_url(city, day, days)
+    return response_cache.fetch_json(
+        "visual_crossing", visual_crossing_cache_key(city, days), day,
+        lambda: fetch_provider_json(visual_crossing_client, url, cost=days),
+        check_cache=check_cache
+    )
+
+def fetch_visual_crossing_batch(batch, day, days=1):
+    # Visual Crossing bills a record per location per day
+    data = fetch_provider_json(visual_crossing_client, visual_crossing_batch_url(batch, day, days), cost=len(batch) * days)
+    locations = data.get("locations", [])
+    by_address = {location.get("address"): location for location in locations}
+
+    payloads = {}
+    for index, city in enumerate(batch):
+        location = by_address.get(visual_crossing_location(city))
+        if location is None and len(locations) == len(batch):
+            location = locations[index]
+        if location is not None and location.get("days"):
+            payloads[city["slug"]] = location
+    return payloads
+
+def prefetch_visual_crossing(cities_to_fetch, day, workers=1, days=1, cached_only=()):
+    # One multi-location request per VISUAL_CROSSING_BATCH_SIZE cache misses,
+    # each covering `days` days from `day`. Misses in cached_only get their
+    # stale cached response instead (see plan_provider_budget).
+    # Returns slug -> payload, or slug -> exception for cities that failed.
+    payloads = {}
+    misses = []
+    for city in cities_to_fetch:
+        cache_key = visual_crossing_cache_key(city, days)
+        cached = response_cache.lookup("visual_crossing", cache_key, day)
+        if cached is not None:
+            payloads[city["slug"]] = cached
+        elif city["slug"] in cached_only:
+            cached = response_cache.stale("visual_crossing", cache_key, day)
+            payloads[city["slug"]] = cached if cached is not None else LookupError(
+                f"No Visual Crossing quota left and nothing cached for {city['slug']}"
+            )
+        else:
+            misses.append(city)
+
+    def fetch_batch(batch):
+        results = {}
+        if len(batch) > 1 and not response_cache.offline:
+            try:
+                with span("visual_crossing_batch"):
+                    results = fetch_visual_crossing_batch(batch, day, days)
+            except Exception as e:
+                telemetry.increment("fallbacks_total", kind="batch", provider="visual_crossing")
+                print(f"⚠️ Visual Crossing batch of {len(batch)} failed, fetching one by one: {e}")
+        for city in batch:
+            if city["slug"] in results:
+                response_cache.store("visual_crossing", visual_crossing_cache_key(city, days), day, results[city["slug"]])
+                continue
+            try:
+                with span("visual_crossing", city=city["slug"]):
+                    results[city["slug"]] = fetch_visual_crossing(city, day, check_cache=False, days=days)
+            except Exception as e:
+                telemetry.increment("provider_failures_total", provider="visual_crossing", city=city["slug"])
+                results[city["slug"]] = e
+        return results
+
+    batches = [misses[i:i + VISUAL_CROSSING_BATCH_SIZE] for i in range(0, len(misses), VISUAL_CROSSING_BATCH_SIZE)]
+    if workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for results in pool.map(fetch_batch, batches):
+                payloads.update(results)
+    else:
+        for batch in batches:
+            payloads.update(fetch_batch(batch))
+    return payloads
+
+# The score formulas take min/max so grid.py can pass np.minimum/np.maximum
+# and score whole arrays with the same code as a single hour here
+
+def hour_score_value(cloud, vis, minimum=min, maximum=max):
+    cloud_score = maximum(0, 10 - abs(cloud - 45) / 5)
+    vis_score = minimum(vis / 10, 1.0) * 10
+    return cloud_score * 0.7 + vis_score * 0.3
+
+def fog_score_value(vis, cloud, minimum=min, maximum=max):
+    return minimum(maximum(10 - minimum(vis, 10) + (cloud / 20), 0), 10)
+
+def cloud_fog_score_value(cloud, minimum=min):
+    # Without a visibility reading
+    return minimum(cloud / 10, 10)
+
+def find_hour_score(conditions, index):
+    # A missing reading counts as overcast with no visibility
+    cloud = conditions.cloud_cover[index]
+    vis = conditions.visibility[index]
+    cloud = 100 if cloud is None else cloud
+    vis = 0 if vis is None else vis
+    return int(hour_score_value(cloud, vis))
+
+def score_hours(conditions, events):
+    # Each score is the conditions in the local hour holding the event
+    scores = {}
+    for event in ("sunrise", "sunset"):
+        index = None
+        if events[event] is not None:
+            index = conditions.index(events[event].replace(tzinfo=None, minute=0, second=0, microsecond=0))
+        scores[f"{event}_score"] = find_hour_score(conditions, index) if index is not None else 0
+    return scores
+
+def get_prediction_scores(city, conditions, events):
+    try:
+        if isinstance(conditions, Exception):
+            raise conditions
+        return score_hours(conditions, events)
 
     except Exception as e:
-        print(f"⚠️ Error fetching weather data for {city_name}: {e}")
+        telemetry.increment("fallbacks_total", kind="scores", provider="visual_crossing", city=city["slug"])
+        print(f"⚠️ Error fetching weather data for {city['name']}: {e}")
         return {
             "sunrise_score": 5,
-            "sunset_score": 5,
-            "moon_phase": {
-                "value": None,
-                "label": "Unknown",
-                "moonrise": moon_data.get("moonrise"),
-                "moonset": moon_data.get("moonset")
-            }
+            "sunset_score": 5
         }
-def get_fog_forecast(city_slug):
-    API_KEY = METEOSOURCE_API_KEY
-    url = f"https://www.meteosource.com/api/v1/free/point?place_id={city_slug}&sections=hourly&timezone=auto&language=en&units=us&key={API_KEY}"
 
+def meteosource_point(city):
+    # Listed cities use their slug as the Meteosource place_id; ad hoc
+    # locations (place_id None) are looked up by coordinates instead
+    place_id = city.get("place_id", city["slug"])
+    if place_id is not None:
+        return f"place_id={place_id}", place_id
+    observer = city["observer"]
+    return f"lat={observer.latitude}&lon={observer.longitude}", f"{observer.latitude},{observer.longitude}"
+
+def fetch_meteosource(city, day, allow_fetch=True, use_stale=True):
+    point, location = meteosource_point(city)
+    url = f"https://www.meteosource.com/api/v1/free/point?{point}&sections=hourly&timezone=auto&language=en&units=us&key={METEOSOURCE_API_KEY}"
+    return response_cache.fetch_json(
+        "meteosource", location, day,
+        lambda: meteosource_client.hedged(
+            lambda sent, hedge, cancel: fetch_meteosource_hours(url, sent=sent, hedge=hedge, cancel=cancel), FOG_DEADLINE
+        ),
+        allow_fetch=allow_fetch, use_stale=use_stale
+    )
+
+def forecast_start(city, day, now=None):
+    # The local hour the fog forecast starts at: now's, or midnight for a later day
+    local_now = (now or datetime.now(pytz.utc)).astimezone(pytz.timezone(city["timezone"])).replace(tzinfo=None)
+    return max(local_now, datetime(day.year, day.month, day.day)).replace(minute=0, second=0, microsecond=0)
+
+def visual_crossing_conditions(city, day, weather=None):
+    # HourlyConditions from a Visual Crossing payload (fetched when not
+    # given), or the exception that stood in for it
+    if weather is None:
+        try:
+            weather = fetch_visual_crossing(city, day)
+        except Exception as e:
+            return e
+    if isinstance(weather, Exception):
+        return weather
+    return from_visual_crossing(weather)
+
+def needs_meteosource(primary, start, mode=METEOSOURCE_MODE):
+    # Always when cross-checking; when filling, only if Visual Crossing
+    # failed or has gaps in the fog forecast hours
+    if mode == "off":
+        return False
+    if mode == "check" or isinstance(primary, Exception):
+        return True
+    return primary.missing(start, FOG_FORECAST_HOURS) > 0
+
+def add_meteosource(city, day, primary, now=None, allow_fetch=True, mode=METEOSOURCE_MODE):
+    # Meteosource as the second provider (see METEOSOURCE_MODE): it fills
+    # hours Visual Crossing is missing, stands in when Visual Crossing failed,
+    # and in check mode is compared against it. Returns (conditions or the
+    # error, info) where info says where the hours came from and, when
+    # checking, how far the two providers disagree.
+    slug = city["slug"]
+    info = {"source": None if isinstance(primary, Exception) else primary.source}
+    if needs_meteosource(primary, forecast_start(city, day, now), mode):
+        try:
+            with span("meteosource", city=slug):
+                secondary = from_meteosource(fetch_meteosource(city, day, allow_fetch))
+        except Exception:
+            telemetry.increment("provider_failures_total", provider="meteosource", city=slug)
+        else:
+            if isinstance(primary, Exception):
+                primary = secondary
+                info["source"] = secondary.source
+            else:
+                if mode == "check":
+                    info["check"] = primary.compare(secondary)
+                primary, filled = primary.fill(secondary)
+                if filled:
+                    info["source"] = primary.source
+                    info["filled_hours"] = filled
+    telemetry.increment("conditions_source_total", source=info["source"] or "none")
+    return primary, info
+
+def hourly_conditions(city, day, now=None, mode=METEOSOURCE_MODE):
+    return add_meteosource(city, day, visual_crossing_conditions(city, day), now, mode=mode)
+
+def conditions_fingerprint(conditions, day, start):
+    # What an entry for day is computed from: the hours from its midnight to
+    # the end of a fog forecast started late that night, and where that
+    # forecast starts. None when there are no hours.
+    if isinstance(conditions, Exception):
+        return None
+    midnight = datetime(day.year, day.month, day.day)
+    window = conditions.between(midnight, midnight + timedelta(hours=24 + FOG_FORECAST_HOURS))
+    return {"start": start.isoformat(), **window.as_dict()}
+
+def seconds_to_sunset(city, day, now):
+    # Until the city's sunset on day, or the next one once it has passed
+    for offset in (0, 1):
+        sunset = city_events(city, day + timedelta(days=offset))["sunset"]
+        if sunset is not None and sunset >= now:
+            return (sunset - now).total_seconds()
+    return float("inf")
+
+def plan_provider_budget(provider, wanted, now):
+    # Decided before the provider is called: when the cities that would call
+    # it (wanted: (city, cost) pairs for the cache misses) cost more than
+    # what's left of its daily quota, the ones with the soonest sunset get
+    # fresh data and the rest are served their stale cached response.
+    # Returns the slugs limited to the cache.
+    remaining = rate_limit.ledger.remaining(provider)
+    if response_cache.offline or remaining is None or sum(cost for _, cost in wanted) <= remaining:
+        return set()
+    wanted = sorted(wanted, key=lambda item: seconds_to_sunset(item[0], local_date(item[0], now), now))
+    fetch, skip = rate_limit.plan([(city["slug"], cost) for city, cost in wanted], remaining)
+    telemetry.increment("quota_deferrals_total", len(skip), provider=provider)
+    print(f"🎫 {provider}: {remaining} left of today's quota, {len(fetch)} cities fetched (soonest sunset first), {len(skip)} use cached data")
+    return set(skip)
+
+def get_fog_forecast(city, conditions, start):
+    # The FOG_FORECAST_HOURS hours from start on
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        if isinstance(conditions, Exception):
+            raise conditions
 
         fog_data = []
-        for hour in data.get("hourly", {}).get("data", [])[:12]:
-            time = hour.get("date")
-            visibility = hour.get("visibility")
-            cloud_cover_data = hour.get("cloud_cover")
-
-            if isinstance(cloud_cover_data, dict):
-                cloud_total = cloud_cover_data.get("total")
-            else:
-                cloud_total = cloud_cover_data
-
-            fog_score = calculate_fog_score(visibility, cloud_total)
-
+        first = conditions.first_from(start)
+        for index in range(first, min(first + FOG_FORECAST_HOURS, len(conditions))):
+            visibility = conditions.visibility[index]
             fog_data.append({
-                "time": time,
+                "time": conditions.hours[index].isoformat(),
                 "visibility": visibility if visibility is not None else "unknown",
                 "cloud_cover": {
-                    "total": cloud_total
+                    "total": conditions.cloud_cover[index]
                 },
-                "fog_score": fog_score
+                "fog_score": calculate_fog_score(conditions, index)
             })
 
         return fog_data
 
     except Exception as e:
-        print(f"⚠️ Error fetching fog forecast for {city_slug}: {e}")
+        telemetry.increment("fallbacks_total", kind="fog", city=city["slug"])
+        print(f"⚠️ Error fetching fog forecast for {city['slug']}: {e}")
         return []
 
-def analyze_twilight_conditions(sun_times, fog_forecast):
-    from_zone = pytz.timezone("America/Los_Angeles")
-
-    def parse_time_to_dt(time_str):
-        now = datetime.now()
-        today = now.date()
-        parsed = datetime.strptime(time_str, "%I:%M %p")
-        combined = datetime.combine(today, parsed.time())
-        return from_zone.localize(combined)
-
-    def parse_forecast_time(forecast_time_str):
-        return datetime.fromisoformat(forecast_time_str).astimezone(from_zone)
-
-    # Build twilight windows
-    twilight_windows = [
-        {
+def fog_timeline(conditions, tz):
+    # Epoch seconds of the scored hours plus running fog score totals, so the
+    # average over any time range is two bisects. The hours are naive local
+    # times, local to the city, not to this machine. Built once per city and
+    # kept on conditions, since every forecast day reads the same hours.
+    timeline = conditions.timelines.get(tz.zone)
+    if timeline is None:
+        times = []
+        scores = []
+        for index, hour in enumerate(conditions.hours):
+            score = calculate_fog_score(conditions, index)
+            if score is None:
+                continue
+            times.append(tz.localize(hour).timestamp())
+            scores.append(score)
+        timeline = conditions.timelines[tz.zone] = (times, [0] + list(accumulate(scores)))
+    return timeline
+
+def analyze_twilight_conditions(sun_times, conditions, tz):
+    times, totals = ([], [0]) if isinstance(conditions, Exception) else fog_timeline(conditions, tz)
+
+    # Build twilight windows (none when the sun doesn't rise or dawn never comes)
+    twilight_windows = []
+    if sun_times["dawn"] and sun_times["sunrise"]:
+        twilight_windows.append({
             "label": "Civil Twilight",
             "start": sun_times["dawn"],
             "end": sun_times["sunrise"]
-        },
-        {
+        })
+    if sun_times["sunrise"]:
+        twilight_windows.append({
             "label": "Golden Hour",
             "start": sun_times["sunrise"],
             "end": sun_times["sunrise"] + timedelta(hours=1)
-        }
-    ]
+        })
 
     # Convert datetime to display strings
     formatted_windows = []
     recommended = None
 
     for window in twilight_windows:
-        matching_fog = [
-            f for f in fog_forecast
-            if "fog_score" in f and f["fog_score"] is not None and
-               parse_forecast_time(f["time"]) >= window["start"] and
-               parse_forecast_time(f["time"]) <= window["end"]
-        ]
-        if matching_fog:
-            avg_fog = sum(f["fog_score"] for f in matching_fog) / len(matching_fog)
+        first = bisect_left(times, window["start"].timestamp())
+        last = bisect_right(times, window["end"].timestamp())
+        if last > first:
+            avg_fog = (totals[last] - totals[first]) / (last - first)
             if recommended is None or avg_fog < recommended["fog_score"]:
                 recommended = {
                     "time": window["start"].strftime("%-I:%M %p"),
@@ -437,45 +509,354 @@ def analyze_twilight_conditions(sun_times, fog_forecast):
 
     return formatted_windows, recommended, summary
 
-def calculate_fog_score(visibility, cloud_cover):
+def calculate_fog_score(conditions, index):
+    visibility = conditions.visibility[index]
+    cloud_cover = conditions.cloud_cover[index]
     if cloud_cover is None:
         return None
     if visibility is None:
-        return round(min(cloud_cover / 10, 10), 1)
-    score = 10 - min(visibility, 10) + (cloud_cover / 20)
-    return round(min(max(score, 0), 10), 1)
-
-def get_moon_phase_label(value):
-    if value is None:
-        return "Unknown"
-    val = (value % 29.53) / 29.53
-    if val == 0 or val == 1:
-        return "New Moon" if val == 0 else "Full Moon"
-    elif 0 < val < 0.25:
-        return "Waxing Crescent"
-    elif val == 0.25:
-        return "First Quarter"
-    elif 0.25 < val < 0.5:
-        return "Waxing Gibbous"
-    elif val == 0.5:
-        return "Full Moon"
-    elif 0.5 < val < 0.75:
-        return "Waning Gibbous"
-    elif val == 0.75:
-        return "Last Quarter"
-    else:
-        return "Waning Crescent"
+        return round(cloud_fog_score_value(cloud_cover), 1)
+    return round(fog_score_value(visibility, cloud_cover), 1)
+
+def entry_date(entry, city, default):
+    # The date an entry's events are for: the city's local date when the run
+    # that wrote it started
+    try:
+        return local_date(city, datetime.fromisoformat(entry["updated_at"]))
+    except (KeyError, TypeError, ValueError):
+        return default
 
-def create_predictions_file():
+def load_previous_predictions(path="predictions.json"):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def create_predictions_file(workers=1, incremental=False, compact=False, archive=True, days=1, prometheus=False, selected=None, schedule=False, meteosource=METEOSOURCE_MODE):
+    # selected: the cities to run (default all); every other city keeps its
+    # previous entry in the output files. schedule: only run the selected
+    # cities that scheduler.py says are due. meteosource: one of
+    # METEOSOURCE_MODES.
+    run_started = time.perf_counter()
+    # One timestamp per run so the sequential and concurrent paths write identical output
+    run_at = datetime.now(pytz.utc)
+    updated_at = run_at.isoformat()
+    today = date.today()
+    run_cities = cities if selected is None else selected
+    # Each city's entry is for its own date, which can be a day either side of today
+    local_dates = {city["slug"]: local_date(city, run_at) for city in cities}
+    first_date = min(local_dates.values(), default=today)
+
+    def events_now(city):
+        return city_events(city, local_dates[city["slug"]])
+
+    previous = load_previous_predictions() if incremental or schedule or len(run_cities) < len(cities) else {}
+    if schedule:
+        if not ephemeris.is_current(cities, first_date):
+            # Every city's events are read below, every run
+            ephemeris.build_ephemeris(cities, first_date, ephemeris.MIN_DAYS_AHEAD + 1)
+        schedule_state = scheduler.load_state()
+        scheduler.seed_state(schedule_state, previous)
+        run_cities, deferred, reasons = scheduler.plan(run_cities, run_at, events_now, schedule_state)
+    subset = len(run_cities) < len(cities)
+
+    previous_fingerprints = load_fingerprints() if incremental or subset else {}
+    previous_forecasts = load_previous_predictions("forecast.json") if subset and days > 1 else {}
+
+    if days > 1 and not ephemeris.is_current(cities, first_date):
+        # Every city x date below is then a table read instead of astral math
+        ephemeris.build_ephemeris(cities, first_date, ephemeris.MIN_DAYS_AHEAD + 1)
+
+    cached_only = {}
+    cached_only["visual_crossing"] = plan_provider_budget("visual_crossing", [
+        (city, days) for city in run_cities
+        if not response_cache.is_fresh("visual_crossing", visual_crossing_cache_key(city, days), local_dates[city["slug"]])
+    ], run_at)
+    # One Visual Crossing request per batch covers the whole horizon; batches
+    # share a start date, so there's a set of them per local date
+    weather = {}
+    for day in sorted({local_dates[city["slug"]] for city in run_cities}):
+        weather.update(prefetch_visual_crossing(
+            [city for city in run_cities if local_dates[city["slug"]] == day],
+            day, workers, days, cached_only["visual_crossing"]
+        ))
+    # Normalized once per city; every forecast day reads the same hours
+    primaries = {
+        city["slug"]: visual_crossing_conditions(city, local_dates[city["slug"]], weather.get(city["slug"]))
+        for city in run_cities
+    }
+    cached_only["meteosource"] = plan_provider_budget("meteosource", [
+        (city, 1) for city in run_cities
+        if needs_meteosource(primaries[city["slug"]], forecast_start(city, local_dates[city["slug"]], run_at), meteosource)
+        and not response_cache.is_fresh("meteosource", meteosource_point(city)[1], local_dates[city["slug"]])
+    ], run_at)
+
+    def run_city(city):
+        started = time.perf_counter()
+        slug = city["slug"]
+        city_day = local_dates[slug]
+        conditions, conditions_info = add_meteosource(
+            city, city_day, primaries[slug], run_at, slug not in cached_only["meteosource"], meteosource
+        )
+        conditions_seconds = time.perf_counter() - started
+
+        fingerprint = city_fingerprint(city, city_day, SCORING_VERSION, [
+            conditions_fingerprint(conditions, city_day, forecast_start(city, city_day, run_at))
+        ])
+        if incremental and fingerprint and slug in previous and previous_fingerprints.get(slug) == fingerprint:
+            # Same inputs give the same entry, updated_at included, so its shard
+            # file stays byte-identical and isn't rewritten
+            city_data = previous[slug]
+            reused = True
+            telemetry.increment("cities_reused_total")
+        else:
+            _, city_data = get_city_data(city, updated_at, conditions, city_day, run_at)
+            reused = False
+
+        forecast = {city_day.isoformat(): city_data}
+        for day in (city_day + timedelta(days=offset) for offset in range(1, days)):
+            _, forecast[day.isoformat()] = get_city_data(city, updated_at, conditions, day, run_at)
+        return slug, city_data, forecast, fingerprint, reused, time.perf_counter() - started, conditions_info, conditions_seconds
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() yields in input order, so the file keeps the same city order
+            results = list(pool.map(run_city, run_cities))
+    else:
+        results = [run_city(city) for city in run_cities]
+
+    computed = {}
+    computed_forecasts = {}
+    fingerprints = {}
+    refreshed = []
+    reused_count = 0
+    sources = {}
+    filled_hours = 0
+    checks = []
+    conditions_latencies = []
+    for slug, city_data, forecast, fingerprint, reused, elapsed, conditions_info, conditions_seconds in results:
+        computed[slug] = city_data
+        computed_forecasts[slug] = forecast
+        if fingerprint:
+            fingerprints[slug] = fingerprint
+            refreshed.append(slug)
+        reused_count += reused
+        source = conditions_info["source"] or "none"
+        sources[source] = sources.get(source, 0) + 1
+        filled_hours += conditions_info.get("filled_hours", 0)
+        if "check" in conditions_info:
+            checks.append(conditions_info["check"])
+        conditions_latencies.append(conditions_seconds)
+        telemetry.observe("city_seconds", elapsed, city=slug)
+        print(f"⏱️ {slug}: {elapsed:.2f}s{' (reused)' if reused else ''}")
+
+    # File order follows cities.json; cities outside the selection keep what
+    # the last run wrote for them
     predictions = {}
+    forecasts = {}
     for city in cities:
-        slug, city_data = get_city_data(city)
-        predictions[slug] = city_data
-
-    with open("predictions.json", "w") as f:
-        json.dump(predictions, f, indent=2)
+        slug = city["slug"]
+        if slug in computed:
+            predictions[slug] = computed[slug]
+            forecasts[slug] = computed_forecasts[slug]
+        elif slug in previous:
+            predictions[slug] = previous[slug]
+            if slug in previous_forecasts:
+                forecasts[slug] = previous_forecasts[slug]
+            if slug in previous_fingerprints:
+                fingerprints[slug] = previous_fingerprints[slug]
+
+    with span("serialize", output="predictions.json"):
+        atomic_write("predictions.json", json.dumps(predictions, indent=2).encode("utf-8"))
+    if days > 1:
+        with span("serialize", output="forecast.json"):
+            atomic_write("forecast.json", json.dumps(forecasts, indent=2).encode("utf-8"))
+    names = {city["slug"]: city["name"] for city in cities}
+    with span("serialize", output="shards"):
+        shards_written = write_shards(predictions, names)
+    if compact:
+        with span("serialize", output="compact"):
+            # Kept entries can be from an earlier run on another date; the
+            # binary times have to describe the same events as the JSON
+            events_by_slug = {
+                city["slug"]: get_astronomy(
+                    city,
+                    entry_date(predictions[city["slug"]], city, local_dates[city["slug"]]),
+                    pytz.timezone(city["timezone"]),
+                )
+                for city in cities if city["slug"] in predictions
+            }
+            write_compact_exports(predictions, names, events_by_slug, today)
+    save_fingerprints(fingerprints)
+    if archive:
+        with span("serialize", output="archive"):
+            archived = append_run(computed, run_at, {slug: local_dates[slug] for slug in computed})
+        print(f"🗄️ {archived} rows appended to {ARCHIVE_PATH}")
+
+    schedule_report = None
+    if schedule:
+        # Cities whose providers failed stay due for the next run
+        scheduler.record(schedule_state, refreshed, run_at)
+        scheduler.save_state(schedule_state)
+        staleness = scheduler.staleness(cities, run_at, events_now, schedule_state)
+        schedule_report = {
+            "lead_minutes": scheduler.LEAD_MINUTES,
+            "max_age_hours": scheduler.MAX_AGE_HOURS,
+            "due": {city["slug"]: reasons[city["slug"]] for city in run_cities},
+            "deferred": [city["slug"] for city in deferred],
+            "summary": scheduler.summarize(staleness),
+            "cities": staleness,
+        }
 
-    print("✅ predictions.json created!")
+    # Where each city's hourly conditions came from, how long getting them
+    # took, and in check mode how far the two providers disagree
+    conditions_report = {
+        "meteosource_mode": meteosource,
+        "sources": sources,
+        "fallback_rate": round(1 - sources.get("visual_crossing", 0) / len(results), 4) if results else None,
+        "filled_hours": filled_hours,
+        "meteosource_requests": meteosource_client.requests,
+        "latency_p50": percentile(conditions_latencies, 50),
+        "latency_p95": percentile(conditions_latencies, 95),
+        "latency_p99": percentile(conditions_latencies, 99),
+        "latency_max": max(conditions_latencies) if conditions_latencies else None,
+        "hedges": meteosource_client.hedges,
+        "hedge_wins": meteosource_client.hedge_wins,
+    }
+    if checks:
+        conditions_report["check"] = {"cities": len(checks)}
+        for field in ("cloud_cover", "visibility"):
+            # Each city's MAD weighted by the hours it was taken over
+            hours = sum(check[f"{field}_hours"] for check in checks)
+            conditions_report["check"][f"{field}_hours"] = hours
+            conditions_report["check"][f"{field}_mad"] = round(
+                sum(check[f"{field}_mad"] * check[f"{field}_hours"] for check in checks if check[f"{field}_hours"]) / hours, 2
+            ) if hours else None
+
+    total = time.perf_counter() - run_started
+    telemetry.observe("stage_seconds", total, stage="run")
+    telemetry.write_report(RUN_REPORT_PATH, {
+        "run": {
+            "run_at": updated_at,
+            "forecast_dates": sorted({local_dates[slug].isoformat() for slug in computed}),
+            "workers": workers,
+            "days": days,
+            "cities": len(computed),
+            "recomputed": len(computed) - reused_count,
+            "reused": reused_count,
+            "seconds": round(total, 3),
+        },
+        "providers": provider_summaries(),
+        "cache": response_cache.snapshot(),
+        "conditions": conditions_report,
+        "quota": {
+            "providers": quota_summaries(),
+            "cached_only": {provider: sorted(slugs) for provider, slugs in cached_only.items() if slugs},
+        },
+        **({"schedule": schedule_report} if schedule else {}),
+    }, RUN_REPORT_PROMETHEUS_PATH if prometheus else None)
+    print_provider_summary()
+    response_cache.print_cache_summary()
+    if schedule:
+        summary = schedule_report["summary"]
+        counts = {}
+        for reason in schedule_report["due"].values():
+            counts[reason] = counts.get(reason, 0) + 1
+        due = ", ".join(f"{count} {reason}" for reason, count in sorted(counts.items())) or "none"
+        print(f"🕒 {len(run_cities)} cities due ({due}), {len(deferred)} deferred")
+        if summary["median_stale_minutes"] is not None:
+            print(
+                f"🕒 data age at event: median {summary['median_stale_minutes']} min, "
+                f"{summary['within_lead']} of {summary['events']} events within {scheduler.LEAD_MINUTES} min"
+            )
+    elif subset:
+        print(f"🧭 {len(computed)} of {len(cities)} cities selected, {len(predictions) - len(computed)} kept from the last run")
+    if results:
+        counts = ", ".join(f"{count} {source}" for source, count in sorted(sources.items()))
+        print(
+            f"🌫️ hourly conditions: {counts}; {meteosource_client.requests} Meteosource requests "
+            f"(mode {meteosource}), fallback rate {conditions_report['fallback_rate']:.1%}, "
+            f"p50 {conditions_report['latency_p50']:.2f}s, p99 {conditions_report['latency_p99']:.2f}s, "
+            f"{conditions_report['hedges']} hedged ({conditions_report['hedge_wins']} won)"
+        )
+        if checks:
+            check = conditions_report["check"]
+            print(
+                f"🔍 Visual Crossing vs Meteosource mean absolute difference: cloud cover "
+                f"{check['cloud_cover_mad']} pts over {check['cloud_cover_hours']} hours, "
+                f"visibility {check['visibility_mad']} mi over {check['visibility_hours']} hours"
+            )
+    print(f"♻️ {len(computed) - reused_count} cities recomputed, {reused_count} reused")
+    print(f"🗂️ {shards_written} of {len(predictions)} shards rewritten in {SHARD_DIR}/")
+    if days > 1:
+        print(f"🗓️ forecast.json: {len(forecasts)} cities x {days} days from each city's local date")
+    print(f"📈 run report written to {RUN_REPORT_PATH}{' and ' + RUN_REPORT_PROMETHEUS_PATH if prometheus else ''}")
+    print(f"✅ predictions.json created! {len(predictions)} cities in {total:.2f}s (workers={workers})")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate predictions.json for every city.")
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("PREDICTION_WORKERS", "1")),
+        help="Cities processed in parallel (1 = sequential)"
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Serve provider data only from the response cache, whatever its age"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Keep the previous entry for cities whose inputs are unchanged"
+    )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="Also write predictions.min.json and the columnar predictions.bin"
+    )
+    parser.add_argument(
+        "--days", type=int, default=int(os.environ.get("FORECAST_DAYS", "1")),
+        choices=range(1, MAX_FORECAST_DAYS + 1), metavar=f"1-{MAX_FORECAST_DAYS}",
+        help="Also write forecast.json covering this many days from today"
+    )
+    parser.add_argument(
+        "--prometheus", action="store_true", default=os.environ.get("RUN_REPORT_PROMETHEUS") == "1",
+        help=f"Also write the run report in Prometheus text format to {RUN_REPORT_PROMETHEUS_PATH}"
+    )
+    parser.add_argument(
+        "--region", action="append", choices=registry.regions(),
+        help="Only run cities in this region (repeatable); the rest keep their previous entries"
+    )
+    parser.add_argument(
+        "--city", action="append", metavar="SLUG",
+        help="Only run this city (repeatable, combines with --region)"
+    )
+    parser.add_argument(
+        "--schedule", action="store_true", default=os.environ.get("PREDICTION_SCHEDULE") == "1",
+        help=f"Only refresh cities with a sunrise or sunset in the next {scheduler.LEAD_MINUTES} minutes (SCHEDULE_LEAD_MINUTES)"
+    )
+    parser.add_argument(
+        "--meteosource", choices=METEOSOURCE_MODES, default=METEOSOURCE_MODE,
+        help="Use Meteosource to fill gaps in Visual Crossing's hourly data, to fill and cross-check, or not at all (METEOSOURCE_MODE)"
+    )
+    parser.add_argument(
+        "--no-archive", dest="archive", action="store_false",
+        help="Don't append this run to the prediction archive"
+    )
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    create_predictions_file()
+    args = parse_args()
+    if args.offline:
+        response_cache.offline = True
+    try:
+        selected = registry.select(args.region, args.city)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    if args.schedule:
+        # A due city is refreshed for its next event, so cached responses from
+        # before its lead window opened don't count as fresh
+        response_cache.CACHE_TTL = min(response_cache.CACHE_TTL, scheduler.LEAD_MINUTES * 60)
+    create_predictions_file(
+        workers=args.workers, incremental=args.incremental, compact=args.compact,
+        archive=args.archive, days=args.days, prometheus=args.prometheus,
+        selected=selected, schedule=args.schedule, meteosource=args.meteosource
+    )
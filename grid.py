@@ -0,0 +1,199 @@
+# Sunrise/sunset score heat map over a lat/lon bounding box.
+#
+# Weather is sampled on a coarse grid (--sample-step degrees) through the same
+# batched Visual Crossing timelinemulti requests and response cache as
+# generate_prediction.py, so a few thousand cells cost a handful of HTTP calls.
+# Sun times for every fine cell come from solar_vector in one call. For each
+# cell, cloud cover and visibility at its local sunrise/sunset hour are
+# bilinearly interpolated from the four surrounding samples and scored with
+# the same formulas as find_hour_score() and calculate_fog_score(). Cells none
+# of whose samples have data for the hour are NaN rather than scored.
+#
+# Writes <output>.npz (scores as float32, sunrise/sunset as epoch seconds, NaN
+# where no data) and <output>.json (rows south to north, columns west to east,
+# null where no data).
+import argparse
+import json
+import math
+import time
+from datetime import date
+
+import numpy as np
+
+import response_cache
+from generate_prediction import cloud_fog_score_value, fog_score_value, hour_score_value, prefetch_visual_crossing
+from on_demand import make_city
+from providers import print_provider_summary
+from shards import atomic_write
+from solar_vector import solar_table, utc_offsets
+
+# name -> (south, west, north, east, timezone)
+REGIONS = {
+    "bay-area": (37.2, -123.1, 38.3, -121.6, "America/Los_Angeles"),
+    "california": (32.5, -124.5, 42.0, -114.1, "America/Los_Angeles"),
+    "lake-tahoe": (38.8, -120.3, 39.4, -119.8, "America/Los_Angeles"),
+}
+
+
+def axis(start, end, step):
+    # Evenly spaced and always including both edges, at least two points
+    count = max(2, int(math.ceil(round((end - start) / step, 6))) + 1)
+    return np.linspace(start, end, count)
+
+
+def sample_hours(cities, payloads):
+    # (samples, 24) cloud cover and visibility by local hour, NaN when missing
+    cloud = np.full((len(cities), 24), np.nan)
+    visibility = np.full((len(cities), 24), np.nan)
+    for row, city in enumerate(cities):
+        payload = payloads.get(city["slug"])
+        if not isinstance(payload, dict) or not payload.get("days"):
+            continue
+        for hour in payload["days"][0].get("hours", []):
+            index = int(hour["datetime"].split(":")[0])
+            if hour.get("cloudcover") is not None:
+                cloud[row, index] = hour["cloudcover"]
+            if hour.get("visibility") is not None:
+                visibility[row, index] = hour["visibility"]
+    return cloud, visibility
+
+
+def bilinear(samples, sample_lats, sample_lons, lats, lons, hours):
+    # samples is (len(sample_lats), len(sample_lons), 24); lats/lons/hours are
+    # per-cell arrays. Corners without data are left out and the rest reweighted.
+    y = (lats - sample_lats[0]) / (sample_lats[-1] - sample_lats[0]) * (len(sample_lats) - 1)
+    x = (lons - sample_lons[0]) / (sample_lons[-1] - sample_lons[0]) * (len(sample_lons) - 1)
+    i = np.clip(np.floor(y).astype(np.int64), 0, len(sample_lats) - 2)
+    j = np.clip(np.floor(x).astype(np.int64), 0, len(sample_lons) - 2)
+    ty = y - i
+    tx = x - j
+
+    total = np.zeros(lats.shape)
+    weight = np.zeros(lats.shape)
+    for di, dj, w in (
+        (0, 0, (1 - ty) * (1 - tx)),
+        (0, 1, (1 - ty) * tx),
+        (1, 0, ty * (1 - tx)),
+        (1, 1, ty * tx),
+    ):
+        values = samples[i + di, j + dj, hours]
+        present = ~np.isnan(values)
+        total += np.where(present, values, 0.0) * w
+        weight += np.where(present, w, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(weight > 0, total / weight, np.nan)
+
+
+def hour_scores(cloud, visibility):
+    # find_hour_score() on arrays: a missing reading counts as overcast with no visibility
+    cloud = np.where(np.isnan(cloud), 100, cloud)
+    visibility = np.where(np.isnan(visibility), 0, visibility)
+    return np.floor(hour_score_value(cloud, visibility, np.minimum, np.maximum))
+
+
+def fog_scores(visibility, cloud):
+    # calculate_fog_score() on arrays, NaN where cloud cover is missing. Left
+    # unrounded: grid_json() rounds with round() like calculate_fog_score(),
+    # and np.round() rounds some ties the other way.
+    return np.where(
+        np.isnan(visibility),
+        cloud_fog_score_value(cloud, np.minimum),
+        fog_score_value(visibility, cloud, np.minimum, np.maximum),
+    )
+
+
+def local_hours(epochs, offsets):
+    with np.errstate(invalid="ignore"):
+        hours = np.floor(((epochs + offsets) % 86400) / 3600)
+    return np.nan_to_num(hours).astype(np.int64), np.isnan(epochs)
+
+
+def build_grid(south, west, north, east, timezone, day, resolution=0.02, sample_step=0.25, workers=4):
+    lats = axis(south, north, resolution)
+    lons = axis(west, east, resolution)
+    cell_lats, cell_lons = np.meshgrid(lats, lons, indexing="ij")
+
+    sample_lats = axis(south, north, sample_step)
+    sample_lons = axis(west, east, sample_step)
+    samples = [make_city(float(lat), float(lon), timezone) for lat in sample_lats for lon in sample_lons]
+    payloads = prefetch_visual_crossing(samples, day, workers)
+    cloud, visibility = sample_hours(samples, payloads)
+    shape = (len(sample_lats), len(sample_lons), 24)
+    cloud = cloud.reshape(shape)
+    visibility = visibility.reshape(shape)
+
+    flat_lats = cell_lats.ravel()
+    flat_lons = cell_lons.ravel()
+    sun = solar_table(flat_lats, flat_lons, [timezone] * flat_lats.size, [day])
+    offset = utc_offsets([timezone], [day])[0, 0]
+
+    grid = {"latitude": lats, "longitude": lons}
+    for event in ("sunrise", "sunset"):
+        epochs = sun[event][:, 0]
+        hours, missing = local_hours(epochs, offset)
+        event_cloud = bilinear(cloud, sample_lats, sample_lons, flat_lats, flat_lons, hours)
+        event_visibility = bilinear(visibility, sample_lats, sample_lons, flat_lats, flat_lons, hours)
+        scores = hour_scores(event_cloud, event_visibility)
+        fog = fog_scores(event_visibility, event_cloud)
+        no_data = missing | (np.isnan(event_cloud) & np.isnan(event_visibility))
+        grid[event] = epochs.reshape(cell_lats.shape)
+        grid[f"{event}_score"] = np.where(no_data, np.nan, scores).reshape(cell_lats.shape)
+        grid[f"{event}_fog_score"] = np.where(missing, np.nan, fog).reshape(cell_lats.shape)
+    return grid, len(samples)
+
+
+def grid_json(grid, bbox, timezone, day):
+    def rows(values, digits=None):
+        return [[None if math.isnan(v) else round(v, digits) for v in row] for row in values.tolist()]
+
+    return {
+        "date": day.isoformat(),
+        "timezone": timezone,
+        "bbox": bbox,
+        "latitude": [round(v, 5) for v in grid["latitude"].tolist()],
+        "longitude": [round(v, 5) for v in grid["longitude"].tolist()],
+        "sunrise_score": rows(grid["sunrise_score"]),
+        "sunset_score": rows(grid["sunset_score"]),
+        "sunrise_fog_score": rows(grid["sunrise_fog_score"], 1),
+        "sunset_fog_score": rows(grid["sunset_fog_score"], 1),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sunrise/sunset score heat map over a bounding box.")
+    parser.add_argument("--region", choices=sorted(REGIONS), default="bay-area")
+    parser.add_argument("--bbox", help="south,west,north,east (overrides --region)")
+    parser.add_argument("--timezone", help="IANA timezone for --bbox (default: the region's)")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today(), help="Forecast date (YYYY-MM-DD)")
+    parser.add_argument("--resolution", type=float, default=0.02, help="Output cell size in degrees")
+    parser.add_argument("--sample-step", type=float, default=0.25, help="Weather sample spacing in degrees")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Visual Crossing batches")
+    parser.add_argument("--offline", action="store_true", help="Use only the response cache")
+    parser.add_argument("--output", default="sunset_grid", help="Writes <output>.npz and <output>.json")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.offline:
+        response_cache.offline = True
+    south, west, north, east, timezone = REGIONS[args.region]
+    if args.bbox:
+        south, west, north, east = (float(value) for value in args.bbox.split(","))
+    timezone = args.timezone or timezone
+
+    started = time.perf_counter()
+    grid, sampled = build_grid(south, west, north, east, timezone, args.date, args.resolution, args.sample_step, args.workers)
+    # Event times stay float64: float32 can't hold epoch seconds to the second
+    arrays = {name: values if name in ("sunrise", "sunset") else values.astype(np.float32) for name, values in grid.items()}
+    np.savez_compressed(f"{args.output}.npz", **arrays)
+    body = json.dumps(grid_json(grid, [south, west, north, east], timezone, args.date), separators=(",", ":"))
+    atomic_write(f"{args.output}.json", body.encode("utf-8"))
+
+    print_provider_summary()
+    response_cache.print_cache_summary()
+    rows, columns = grid["sunset_score"].shape
+    print(
+        f"🗺️ {rows}x{columns} grid ({rows * columns} cells) from {sampled} weather samples "
+        f"in {time.perf_counter() - started:.2f}s -> {args.output}.npz, {args.output}.json"
+    )
@@ -0,0 +1,61 @@
+# Moon phase is the same everywhere at a given instant, so it is computed once
+# per date and shared by every city instead of once per city per run.
+import argparse
+import json
+from datetime import date, timedelta
+from functools import lru_cache
+
+from astral.moon import phase
+
+
+def get_moon_phase_label(value):
+    if value is None:
+        return "Unknown"
+    val = (value % 29.53) / 29.53
+    if val == 0 or val == 1:
+        return "New Moon" if val == 0 else "Full Moon"
+    elif 0 < val < 0.25:
+        return "Waxing Crescent"
+    elif val == 0.25:
+        return "First Quarter"
+    elif 0.25 < val < 0.5:
+        return "Waxing Gibbous"
+    elif val == 0.5:
+        return "Full Moon"
+    elif 0.5 < val < 0.75:
+        return "Waning Gibbous"
+    elif val == 0.75:
+        return "Last Quarter"
+    else:
+        return "Waning Crescent"
+
+
+@lru_cache(maxsize=1024)
+def phase_value_and_label(day):
+    value = phase(day)
+    return round(value, 2), get_moon_phase_label(value)
+
+
+def moon_phase_for(day):
+    # A fresh dict per caller; the cached tuple underneath is shared
+    value, label = phase_value_and_label(day)
+    return {"value": value, "label": label}
+
+
+def moon_phase_calendar(start, days):
+    return {
+        (start + timedelta(days=offset)).isoformat(): moon_phase_for(start + timedelta(days=offset))
+        for offset in range(days)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Print the moon phase for a range of dates as JSON.")
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today(), help="First date (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=30, help="Number of days")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(json.dumps(moon_phase_calendar(args.start, args.days), indent=2))
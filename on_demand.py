@@ -0,0 +1,117 @@
+# Predictions for any latitude/longitude/timezone, computed on request.
+#
+# Coordinates are rounded (COORDINATE_DECIMALS, ~1 km at 2) so nearby
+# requests share one result. Concurrent requests for the same rounded
+# location and date wait on a single in-flight computation rather than each
+# calling the providers, and finished entries stay in a bounded LRU for as
+# long as the provider responses they came from (response_cache.CACHE_TTL).
+# When neither provider has hours for the location, predict() raises
+# NoConditions instead of caching an entry of default scores.
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+
+import pytz
+from astral import LocationInfo
+
+import response_cache
+from generate_prediction import get_city_data, hourly_conditions
+
+COORDINATE_DECIMALS = int(os.environ.get("ON_DEMAND_COORDINATE_DECIMALS", "2"))
+CACHE_SIZE = int(os.environ.get("ON_DEMAND_CACHE_SIZE", "256"))
+
+lock = threading.Lock()
+in_flight = {}
+# key -> (monotonic time computed, entry)
+results = OrderedDict()
+stats = {"computed": 0, "coalesced": 0, "hits": 0}
+
+
+class NoConditions(Exception):
+    pass
+
+
+def make_city(latitude, longitude, timezone):
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError(f"Coordinates out of range: {latitude},{longitude}")
+    if timezone not in pytz.all_timezones_set:
+        raise ValueError(f"Unknown timezone: {timezone}")
+    latitude = round(latitude, COORDINATE_DECIMALS)
+    longitude = round(longitude, COORDINATE_DECIMALS)
+    name = f"{latitude},{longitude}"
+    return {
+        "slug": name,
+        "name": name,
+        "timezone": timezone,
+        # Not a Meteosource place, so it's looked up by coordinates
+        "place_id": None,
+        "observer": LocationInfo(name, "", timezone, latitude, longitude).observer,
+    }
+
+
+def predict(latitude, longitude, timezone, day=None):
+    city = make_city(latitude, longitude, timezone)
+    day = day or date.today()
+    key = (city["slug"], timezone, day)
+
+    with lock:
+        if key in results:
+            computed_at, entry = results[key]
+            if time.monotonic() - computed_at < response_cache.CACHE_TTL:
+                results.move_to_end(key)
+                stats["hits"] += 1
+                return entry
+            # Older than the forecast it was built from: compute it again
+            del results[key]
+        future = in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = in_flight[key] = Future()
+            stats["computed"] += 1
+        else:
+            stats["coalesced"] += 1
+
+    if not owner:
+        return future.result()
+
+    try:
+        # get_city_data() would stand in default scores for missing weather;
+        # that's fine for a scheduled run but not worth caching for hours here
+        conditions, _ = hourly_conditions(city, day)
+        if isinstance(conditions, Exception):
+            raise NoConditions(f"No hourly conditions for {city['slug']}: {conditions}") from conditions
+        if not len(conditions):
+            raise NoConditions(f"No hourly conditions for {city['slug']} on {day}")
+        _, entry = get_city_data(city, conditions=conditions, day=day)
+    except Exception as e:
+        with lock:
+            del in_flight[key]
+        future.set_exception(e)
+        raise
+
+    with lock:
+        results[key] = (time.monotonic(), entry)
+        if len(results) > CACHE_SIZE:
+            results.popitem(last=False)
+        del in_flight[key]
+    future.set_result(entry)
+    return entry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Print a prediction for any location.")
+    parser.add_argument("latitude", type=float)
+    parser.add_argument("longitude", type=float)
+    parser.add_argument("timezone", help="IANA timezone, e.g. America/Los_Angeles")
+    parser.add_argument("--date", type=date.fromisoformat, help="Forecast date (YYYY-MM-DD, default today)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(json.dumps(predict(args.latitude, args.longitude, args.timezone, args.date), indent=2))
@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import rate_limit
+import telemetry
+
+# Status codes worth another attempt; anything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = int(os.environ.get("PROVIDER_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.environ.get("PROVIDER_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.environ.get("PROVIDER_BACKOFF_MAX", "30"))
+
+# hedged(): a second copy of a request goes out once the first has taken
+# longer than this percentile of the provider's latencies in this run (or
+# HEDGE_DEFAULT_DELAY seconds until there are HEDGE_MIN_SAMPLES of them);
+# a percentile of 0 turns hedging off
+HEDGE_PERCENTILE = float(os.environ.get("PROVIDER_HEDGE_PERCENTILE", "90"))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("PROVIDER_HEDGE_DELAY", "2.0"))
+HEDGE_MIN_SAMPLES = 10
+hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+# Every client created in this process, keyed by provider name, for the run summary
+clients = {}
+
+
+def retry_after_seconds(response):
+    header = response.headers.get("Retry-After")
+    if not header:
+        return None
+    try:
+        return max(float(header), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+# Pooled, retrying HTTP client for one provider. The session keeps connections
+# alive, so a run pays one TLS handshake per pooled connection, not per request.
+class Cancelled(Exception):
+    pass
+
+
+class ProviderClient:
+    def __init__(self, name, max_concurrency=4):
+        self.name = name
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        rate, _ = rate_limit.limits_for(name)
+        self.bucket = rate_limit.TokenBucket(rate)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.bytes = 0
+        self.parse_seconds = 0.0
+        self.throttle_seconds = 0.0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latencies = []
+        clients[name] = self
+
+    def get(self, url, timeout=10, cost=1, sent=None, hedge=False, cancel=None, **kwargs):
+        # cost: quota units this request uses, charged on every attempt that
+        # goes out. sent: an Event set once the first attempt is on the wire.
+        # hedge: skip the concurrency slots, since a hedge that queues behind
+        # the request it's racing can't win. cancel: an Event that, once set,
+        # stops attempts that haven't gone out yet with Cancelled.
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            if waited:
+                with self.lock:
+                    self.throttle_seconds += waited
+                telemetry.observe("provider_throttle_seconds", waited, provider=self.name)
+            started = time.perf_counter()
+            try:
+                with nullcontext() if hedge else self.slots:
+                    if cancel is not None and cancel.is_set():
+                        raise Cancelled(f"{self.name} request no longer needed")
+                    # Charged once the attempt is really going out
+                    rate_limit.ledger.charge(self.name, cost)
+                    if sent is not None:
+                        sent.set()
+                    response = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.record(started, error=True)
+                if attempt >= MAX_RETRIES:
+                    raise
+                delay = None
+            else:
+                # Streamed bodies are counted by the caller via record_transfer()
+                size = 0 if kwargs.get("stream") else len(response.content)
+                self.record(started, error=response.status_code >= 400, size=size)
+                if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                    return response
+                delay = retry_after_seconds(response)
+                response.close()
+
+            if delay is None:
+                delay = BACKOFF_BASE * (2 ** attempt)
+            attempt += 1
+            with self.lock:
+                self.retries += 1
+            telemetry.increment("provider_retries_total", provider=self.name)
+            time.sleep(min(delay, BACKOFF_MAX))
+
+    def hedge_delay(self):
+        if not HEDGE_PERCENTILE:
+            return float("inf")
+        with self.lock:
+            latencies = list(self.latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return percentile(latencies, HEDGE_PERCENTILE)
+
+    def hedged(self, call, deadline=None):
+        # call(sent, hedge, cancel) makes one request through
+        # get(..., sent=sent, hedge=hedge, cancel=cancel). When it hasn't
+        # answered hedge_delay() after going out, a second call is made and
+        # the first good answer wins; the loser finishes in the background.
+        # Raises the last error when both fail, TimeoutError when nothing has
+        # answered within deadline seconds of the request going out.
+        sent = threading.Event()
+        cancel = threading.Event()
+        primary = hedge_pool.submit(call, sent, False, cancel)
+        # A call that fails before sending (e.g. over quota) also ends the wait
+        primary.add_done_callback(lambda _: sent.set())
+        # Both the deadline and the hedge delay run from when the request goes
+        # out, not from a rate limit or slot wait
+        sent.wait()
+        started = time.perf_counter()
+        hedge_at = started + self.hedge_delay()
+        try:
+            return self.race(call, primary, cancel, started, hedge_at, deadline)
+        finally:
+            # A hedge still waiting for a token isn't sent (or charged) once
+            # there's an answer or the caller has given up
+            cancel.set()
+
+    def race(self, call, primary, cancel, started, hedge_at, deadline):
+        pending = {primary}
+        hedge = None
+        error = None
+
+        def time_left():
+            return None if deadline is None else max(started + deadline - time.perf_counter(), 0)
+
+        while pending:
+            timeout = time_left()
+            if hedge is None and error is None:
+                until_hedge = max(hedge_at - time.perf_counter(), 0)
+                timeout = until_hedge if timeout is None else min(timeout, until_hedge)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if hedge is not None:
+                    won = future is hedge
+                    with self.lock:
+                        self.hedge_wins += won
+                    telemetry.increment("provider_hedges_total", provider=self.name, outcome="won" if won else "lost")
+                return result
+            if done:
+                continue
+            if hedge is None and error is None and time.perf_counter() >= hedge_at and time_left() != 0:
+                hedge = hedge_pool.submit(call, None, True, cancel)
+                pending.add(hedge)
+                with self.lock:
+                    self.hedges += 1
+            elif time_left() == 0:
+                raise TimeoutError(f"No {self.name} response within {deadline:.1f}s")
+        raise error
+
+    def record(self, started, error=False, size=0):
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+            self.latencies.append(elapsed)
+            if error:
+                self.errors += 1
+        telemetry.observe("provider_request_seconds", elapsed, provider=self.name, outcome="error" if error else "ok")
+
+    def record_parse(self, seconds):
+        with self.lock:
+            self.parse_seconds += seconds
+
+    def record_transfer(self, size, parse_seconds):
+        with self.lock:
+            self.bytes += size
+            self.parse_seconds += parse_seconds
+
+    def connection_stats(self):
+        opened = 0
+        sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return {"connections_opened": opened, "connections_reused": max(sent - opened, 0)}
+
+    def summary(self):
+        with self.lock:
+            latencies = list(self.latencies)
+            stats = {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "bytes": self.bytes,
+                "parse_seconds": self.parse_seconds,
+                "throttle_seconds": self.throttle_seconds,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            }
+        stats.update(self.connection_stats())
+        stats["latency_p50"] = percentile(latencies, 50)
+        stats["latency_p95"] = percentile(latencies, 95)
+        stats["latency_max"] = max(latencies) if latencies else None
+        return stats
+
+
+def provider_summaries():
+    return {name: client.summary() for name, client in clients.items()}
+
+
+def quota_summaries():
+    return rate_limit.ledger.summary(clients)
+
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def print_provider_summary():
+    for name, client in clients.items():
+        stats = client.summary()
+        if not stats["requests"]:
+            continue
+        print(
+            f"📡 {name}: {stats['requests']} requests, {stats['retries']} retries, "
+            f"{stats['errors']} errors, {stats['bytes'] / 1024:.1f} KiB, "
+            f"parse {stats['parse_seconds'] * 1000:.1f} ms, "
+            f"{stats['connections_reused']} reused / "
+            f"{stats['connections_opened']} new connections, "
+            f"p50 {format_seconds(stats['latency_p50'])}, "
+            f"p95 {format_seconds(stats['latency_p95'])}, "
+            f"max {format_seconds(stats['latency_max'])}"
+            + (f", throttled {stats['throttle_seconds']:.1f}s" if stats["throttle_seconds"] else "")
+            + (f", {stats['hedges']} hedged ({stats['hedge_wins']} won)" if stats["hedges"] else "")
+        )
+    for name, quota in quota_summaries().items():
+        if not quota["used_this_run"] and not quota["denied"]:
+            continue
+        limit = f" of {quota['daily_quota']}" if quota["daily_quota"] else ""
+        denied = f", {quota['denied']} denied" if quota["denied"] else ""
+        print(f"🎫 {name} quota: {quota['used_this_run']} used this run, {quota['used_today']}{limit} today{denied}")
@@ -0,0 +1,147 @@
+# Client-side rate limits and daily quotas for the weather providers.
+#
+# Each provider gets a token bucket (requests per minute, bursting up to the
+# same number) that ProviderClient.get() waits on before every attempt, and a
+# daily quota counted in a ledger under .cache, so it holds across runs on the
+# same day (UTC, when the providers reset). Quotas are in the provider's own
+# billing unit: Visual Crossing bills one record per location per day,
+# Meteosource and WeatherAPI bill calls. A limit of 0 means none.
+#
+# plan() is the budgeting half: given the fetches a run would like to make in
+# priority order, it picks the ones that fit in what's left of the quota.
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+LEDGER_PATH = os.environ.get("QUOTA_LEDGER_PATH", os.path.join(".cache", "quota.json"))
+
+# provider -> (requests per minute, daily quota); free tier limits by default,
+# overridable as e.g. METEOSOURCE_RATE_PER_MINUTE and METEOSOURCE_DAILY_QUOTA
+DEFAULT_LIMITS = {
+    "visual_crossing": (0, 1000),
+    "meteosource": (10, 400),
+    "weatherapi": (0, 0),
+}
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def limits_for(provider):
+    rate, quota = DEFAULT_LIMITS.get(provider, (0, 0))
+    prefix = provider.upper()
+    return (
+        float(os.environ.get(f"{prefix}_RATE_PER_MINUTE", rate)),
+        int(os.environ.get(f"{prefix}_DAILY_QUOTA", quota)),
+    )
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60
+        self.capacity = burst or max(per_minute, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Blocks until a token is free; returns the seconds spent waiting
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class QuotaLedger:
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.run_used = {}
+        self.denied = {}
+
+    def today(self):
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def read(self):
+        # provider -> units used today; other days are dropped
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state.get("used", {}) if state.get("date") == self.today() else {}
+
+    def write(self, used):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump({"date": self.today(), "used": used}, f, indent=2, sort_keys=True)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def remaining(self, provider):
+        # None when the provider has no quota
+        _, quota = limits_for(provider)
+        if not quota:
+            return None
+        with self.lock:
+            return max(quota - self.read().get(provider, 0), 0)
+
+    def charge(self, provider, cost=1):
+        _, quota = limits_for(provider)
+        with self.lock:
+            # Re-read every time so runs on the same day add up
+            used = self.read()
+            if quota and used.get(provider, 0) + cost > quota:
+                self.denied[provider] = self.denied.get(provider, 0) + cost
+                raise QuotaExceeded(f"{provider} daily quota of {quota} reached ({used.get(provider, 0)} used)")
+            used[provider] = used.get(provider, 0) + cost
+            self.write(used)
+            self.run_used[provider] = self.run_used.get(provider, 0) + cost
+
+    def summary(self, providers):
+        with self.lock:
+            used = self.read()
+            run_used = dict(self.run_used)
+            denied = dict(self.denied)
+        report = {}
+        for provider in providers:
+            _, quota = limits_for(provider)
+            report[provider] = {
+                "daily_quota": quota or None,
+                "used_this_run": run_used.get(provider, 0),
+                "used_today": used.get(provider, 0),
+                "remaining": max(quota - used.get(provider, 0), 0) if quota else None,
+                "denied": denied.get(provider, 0),
+            }
+        return report
+
+
+ledger = QuotaLedger()
+
+
+def plan(wanted, budget):
+    # wanted: (key, cost) in priority order. Returns (fetch, skip): the keys
+    # that fit in budget, taken greedily in order, and the ones that don't.
+    if budget is None:
+        return [key for key, _ in wanted], []
+    fetch = []
+    skip = []
+    for key, cost in wanted:
+        if cost <= budget:
+            fetch.append(key)
+            budget -= cost
+        else:
+            skip.append(key)
+    return fetch, skip
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import telemetry
+
+CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR", os.path.join(".cache", "responses"))
+# Shorter than the 4 hour interval between full runs so each one still refreshes;
+# --schedule lowers it to the lead window
+CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "10800"))
+CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# When set, never touch the network and serve whatever is cached, however old
+offline = os.environ.get("RESPONSE_CACHE_OFFLINE") == "1"
+
+lock = threading.Lock()
+stats = {}
+# Bytes under CACHE_DIR, from one directory walk and then kept up to date by
+# store(), so eviction only walks the directory again when over the limit
+cache_bytes = None
+
+
+def count(provider, outcome):
+    with lock:
+        provider_stats = stats.setdefault(provider, {"hits": 0, "misses": 0, "stale": 0})
+        provider_stats[outcome] += 1
+    telemetry.increment("cache_lookups_total", provider=provider, outcome=outcome)
+
+
+def cache_path(provider, location, day):
+    key = f"{provider}|{location}|{day.isoformat()}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, provider, f"{digest}.json")
+
+
+def read_entry(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_entry(path, entry):
+    # Returns the change in bytes on disk
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        previous = os.path.getsize(path)
+    except OSError:
+        previous = 0
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f, separators=(",", ":"))
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size - previous
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    # Least recently used first: reads touch the file mtime, so mtime is last use.
+    # Returns the bytes left.
+    entries = []
+    total = 0
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+    return total
+
+
+def lookup(provider, location, day, ttl=None):
+    # Fresh cached payload (any age when offline), counted as a hit or a miss.
+    # ttl defaults to CACHE_TTL as it is when called, so callers can lower it.
+    ttl = CACHE_TTL if ttl is None else ttl
+    path = cache_path(provider, location, day)
+    entry = read_entry(path)
+    if entry is not None and (offline or time.time() - entry["stored_at"] < ttl):
+        count(provider, "hits")
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["payload"]
+    count(provider, "misses")
+    return None
+
+
+def is_fresh(provider, location, day, ttl=None):
+    # Whether lookup() would hit, without counting or touching the entry
+    ttl = CACHE_TTL if ttl is None else ttl
+    entry = read_entry(cache_path(provider, location, day))
+    return entry is not None and (offline or time.time() - entry["stored_at"] < ttl)
+
+
+def stale(provider, location, day):
+    # Whatever is cached regardless of age, for when the provider can't be reached
+    entry = read_entry(cache_path(provider, location, day))
+    if entry is None:
+        return None
+    count(provider, "stale")
+    return entry["payload"]
+
+
+def store(provider, location, day, payload):
+    global cache_bytes
+    added = write_entry(cache_path(provider, location, day), {
+        "provider": provider,
+        "location": location,
+        "date": day.isoformat(),
+        "stored_at": time.time(),
+        "payload": payload,
+    })
+    with lock:
+        if cache_bytes is None:
+            # First store in this process: the walk already includes this entry
+            cache_bytes = evict(CACHE_MAX_BYTES)
+        else:
+            cache_bytes += added
+            if cache_bytes > CACHE_MAX_BYTES:
+                cache_bytes = evict(CACHE_MAX_BYTES)
+
+
+def fetch_json(provider, location, day, fetch, ttl=None, check_cache=True, allow_fetch=True, use_stale=True):
+    # check_cache=False is for callers that already did the lookup themselves;
+    # allow_fetch=False serves a stale entry instead of calling the provider;
+    # use_stale=False raises instead of serving one, for callers with other
+    # fallbacks to try first
+    payload = lookup(provider, location, day, ttl) if check_cache else None
+    if payload is not None:
+        return payload
+    if offline:
+        raise LookupError(f"No cached {provider} response for {location} on {day}")
+    if not allow_fetch:
+        payload = stale(provider, location, day) if use_stale else None
+        if payload is None:
+            raise LookupError(f"No {provider} quota left and nothing cached for {location} on {day}")
+        return payload
+
+    try:
+        payload = fetch()
+    except Exception as e:
+        payload = stale(provider, location, day) if use_stale else None
+        if payload is None:
+            raise
+        print(f"📦 Using stale {provider} cache for {location}: {e}")
+        return payload
+
+    store(provider, location, day, payload)
+    return payload
+
+
+def snapshot():
+    with lock:
+        return {provider: dict(values) for provider, values in stats.items()}
+
+
+def print_cache_summary():
+    for provider, values in snapshot().items():
+        print(
+            f"📦 {provider} cache: {values['hits']} hits, {values['misses']} misses, "
+            f"{values['stale']} stale fallbacks"
+        )
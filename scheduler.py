@@ -0,0 +1,155 @@
+# Refresh scheduling for generate_prediction.py --schedule.
+#
+# Instead of refreshing every city on a fixed interval, the workflow runs often
+# and each run only refreshes the cities whose sunrise or sunset is less than
+# SCHEDULE_LEAD_MINUTES away and that haven't been refreshed since that window
+# opened. The events are the ones on the city's local date, i.e. the ones its
+# predictions.json entry describes, so a US sunset after 00:00 UTC or an East
+# Asian sunrise before it is planned like any other. Events move around the
+# globe with the terminator, so provider load is spread over the day instead
+# of arriving all at once; SCHEDULE_MAX_CITIES caps a single run, soonest
+# event first, and the rest are picked up by the next run. An event whose lead
+# window opens before local midnight (sunrise before 01:30 with the default
+# lead) is only covered by the max-age rule.
+#
+# Refresh times are kept per city in .cache/schedule.json, which is also how the
+# run report tells how old each city's data was when its events happened.
+import json
+import os
+import statistics
+from datetime import datetime, timezone
+
+SCHEDULE_PATH = os.environ.get("SCHEDULE_PATH", os.path.join(".cache", "schedule.json"))
+LEAD_MINUTES = int(os.environ.get("SCHEDULE_LEAD_MINUTES", "90"))
+# Refreshed regardless after this long, e.g. polar cities with no sunrise or sunset
+MAX_AGE_HOURS = int(os.environ.get("SCHEDULE_MAX_AGE_HOURS", "24"))
+# Most cities refreshed per run (0 = no limit)
+MAX_CITIES = int(os.environ.get("SCHEDULE_MAX_CITIES", "0"))
+# Refresh times kept per city, enough to cover a day of events
+HISTORY = 8
+EVENTS = ("sunrise", "sunset")
+
+
+def load_state(path=SCHEDULE_PATH):
+    # slug -> epoch seconds of its recent refreshes, oldest first
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=SCHEDULE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def seed_state(state, previous):
+    # Cities without a schedule yet count as refreshed when their entry was
+    # written, so switching to --schedule doesn't refresh everything at once
+    for slug, entry in previous.items():
+        if slug not in state and entry.get("updated_at"):
+            try:
+                state[slug] = [int(datetime.fromisoformat(entry["updated_at"]).timestamp())]
+            except ValueError:
+                continue
+
+
+def record(state, slugs, now):
+    refreshed = int(now.timestamp())
+    for slug in slugs:
+        state[slug] = (state.get(slug, []) + [refreshed])[-HISTORY:]
+
+
+def plan(cities, now, events_for, state, lead=LEAD_MINUTES, max_age=MAX_AGE_HOURS, limit=MAX_CITIES):
+    # events_for(city): the city's events on its local date at now.
+    # Returns (due, deferred, reasons): the cities to refresh now in the given
+    # order, the due ones left for the next run by the limit, and why each
+    # city was picked ("new", "max-age" or the event it's refreshed for)
+    now_epoch = now.timestamp()
+    candidates = []
+    reasons = {}
+    for index, city in enumerate(cities):
+        slug = city["slug"]
+        refreshes = state.get(slug)
+        last = refreshes[-1] if refreshes else None
+        if last is None:
+            reason, priority = "new", now_epoch
+        else:
+            reason = priority = None
+            events = events_for(city)
+            for name in EVENTS:
+                event = events.get(name)
+                if event is None or event.timestamp() <= now_epoch:
+                    continue
+                opens = event.timestamp() - lead * 60
+                if opens <= now_epoch and last < opens and (priority is None or event.timestamp() < priority):
+                    reason, priority = name, event.timestamp()
+            if reason is None and now_epoch - last >= max_age * 3600:
+                reason, priority = "max-age", last + max_age * 3600
+        if reason is not None:
+            reasons[slug] = reason
+            candidates.append((priority, index, city))
+
+    candidates.sort(key=lambda item: item[:2])
+    if limit:
+        candidates, over = candidates[:limit], candidates[limit:]
+    else:
+        over = []
+    due = [city for _, _, city in sorted(candidates, key=lambda item: item[1])]
+    deferred = [city for _, _, city in over]
+    return due, deferred, reasons
+
+
+def iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def staleness(cities, now, events_for, state):
+    # Per city and event on its local date: minutes between the last refresh
+    # before the event and the event. Upcoming events assume no further
+    # refresh; None when the city wasn't refreshed before the event at all.
+    report = {}
+    for city in cities:
+        refreshes = state.get(city["slug"], [])
+        events = events_for(city)
+        entry = {"refreshed_at": iso(refreshes[-1]) if refreshes else None}
+        for name in EVENTS:
+            event = events.get(name)
+            if event is None:
+                entry[name] = None
+                continue
+            before = [refreshed for refreshed in refreshes if refreshed <= event.timestamp()]
+            entry[name] = {
+                "at": event.astimezone(timezone.utc).isoformat(),
+                "passed": event <= now,
+                "stale_minutes": round((event.timestamp() - before[-1]) / 60, 1) if before else None,
+            }
+        report[city["slug"]] = entry
+    return report
+
+
+def summarize(report, lead=LEAD_MINUTES):
+    ages = []
+    worst = None
+    missed = 0
+    for slug, entry in report.items():
+        for name in EVENTS:
+            event = entry.get(name)
+            if event is None:
+                continue
+            if event["stale_minutes"] is None:
+                missed += 1
+                continue
+            ages.append(event["stale_minutes"])
+            if worst is None or event["stale_minutes"] > worst["stale_minutes"]:
+                worst = {"city": slug, "event": name, "stale_minutes": event["stale_minutes"]}
+    return {
+        "events": len(ages) + missed,
+        "within_lead": sum(age <= lead for age in ages),
+        "not_refreshed_before": missed,
+        "median_stale_minutes": round(statistics.median(ages), 1) if ages else None,
+        "worst": worst,
+    }
@@ -0,0 +1,260 @@
+# Small HTTP server for the generated files.
+#
+#   GET /predictions          predictions.json
+#   GET /predictions/<slug>   predictions/<slug>.json
+#   GET /weather              weather.json
+#   GET /predict?lat=&lon=&tz=[&date=]   on-demand prediction (see on_demand.py)
+#
+# Every body is loaded once, gzip-compressed once and given a strong ETag per
+# encoding, so a request is a dict lookup plus a write; If-None-Match answers
+# 304. A watcher thread reloads everything when the generator replaces one of
+# the files.
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+import on_demand
+from rate_limit import QuotaExceeded
+from shards import SHARD_DIR
+
+PREDICTIONS_PATH = "predictions.json"
+WEATHER_PATH = "weather.json"
+RELOAD_INTERVAL = float(os.environ.get("SERVER_RELOAD_INTERVAL", "1.0"))
+CACHE_CONTROL = "public, max-age=60"
+
+
+def make_resource(body):
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    # A strong ETag names one representation, so the gzip body gets its own
+    return {
+        "body": body,
+        "gzip": gzip.compress(body, mtime=0),
+        "etag": f'"{digest}"',
+        "gzip_etag": f'"{digest}-gzip"',
+    }
+
+
+def etag_matches(header, etag):
+    # If-None-Match is "*" or a comma-separated list of (possibly weak) tags,
+    # compared weakly (RFC 7232 section 3.2)
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def accepts_gzip(header):
+    # Accept-Encoding is a comma-separated list of codings with optional
+    # q-values (RFC 7231 section 5.3.4); q=0 refuses a coding, and an explicit
+    # gzip or x-gzip entry overrides "*"
+    star = None
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = coding.lower()
+        if coding in ("gzip", "x-gzip"):
+            return quality > 0
+        if coding == "*":
+            star = quality > 0
+    return bool(star)
+
+
+def read_bytes(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class ResourceStore:
+    def __init__(self, root="."):
+        self.root = root
+        self.resources = {}
+        self.signature = None
+        self.reload()
+
+    def watched_paths(self):
+        paths = [os.path.join(self.root, PREDICTIONS_PATH), os.path.join(self.root, WEATHER_PATH)]
+        shard_dir = os.path.join(self.root, SHARD_DIR)
+        if os.path.isdir(shard_dir):
+            paths.extend(sorted(os.path.join(shard_dir, name) for name in os.listdir(shard_dir)))
+        return paths
+
+    def current_signature(self):
+        signature = []
+        for path in self.watched_paths():
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, info.st_mtime_ns, info.st_size))
+        return tuple(signature)
+
+    def reload(self):
+        signature = self.current_signature()
+        resources = {}
+
+        predictions = read_bytes(os.path.join(self.root, PREDICTIONS_PATH))
+        if predictions is not None:
+            resources["/predictions"] = make_resource(predictions)
+            try:
+                slugs = list(json.loads(predictions))
+            except ValueError:
+                slugs = []
+            entries = None
+            for slug in slugs:
+                body = read_bytes(os.path.join(self.root, SHARD_DIR, f"{slug}.json"))
+                if body is None:
+                    # No shard on disk (older generator run): cut it from the combined file
+                    entries = entries or json.loads(predictions)
+                    body = json.dumps(entries[slug], indent=2).encode("utf-8")
+                resources[f"/predictions/{slug}"] = make_resource(body)
+
+        weather = read_bytes(os.path.join(self.root, WEATHER_PATH))
+        if weather is not None:
+            resources["/weather"] = make_resource(weather)
+
+        # One assignment, so request threads see the old set or the new one
+        self.resources = resources
+        self.signature = signature
+
+    def watch(self, stop):
+        while not stop.wait(RELOAD_INTERVAL):
+            if self.current_signature() != self.signature:
+                self.reload()
+                print(f"🔄 reloaded {len(self.resources)} resources")
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this keep-alive
+    # clients stall ~40ms on delayed ACKs
+    disable_nagle_algorithm = True
+    store = None
+    quiet = False
+
+    def do_GET(self):
+        self.respond(include_body=True)
+
+    def do_HEAD(self):
+        self.respond(include_body=False)
+
+    def respond(self, include_body):
+        path, _, query = self.path.partition("?")
+        path = path.rstrip("/") or "/"
+        if path == "/predict":
+            resource = self.predict(parse_qs(query), include_body)
+            if resource is not None:
+                self.send_resource(resource, include_body)
+            return
+
+        resource = self.store.resources.get(path)
+        if resource is None:
+            self.send_json(404, {"error": f"Not found: {path}"}, include_body)
+            return
+        self.send_resource(resource, include_body)
+
+    def predict(self, params, include_body):
+        try:
+            latitude = float(params["lat"][0])
+            longitude = float(params["lon"][0])
+            timezone = params["tz"][0]
+            day = date.fromisoformat(params["date"][0]) if "date" in params else None
+            entry = on_demand.predict(latitude, longitude, timezone, day)
+        except (KeyError, ValueError) as e:
+            self.send_json(400, {"error": f"Expected lat, lon, tz and optional date: {e}"}, include_body)
+            return None
+        except (on_demand.NoConditions, requests.RequestException, QuotaExceeded, TimeoutError) as e:
+            self.send_json(502, {"error": f"Weather provider failed: {e}"}, include_body)
+            return None
+        except Exception as e:
+            self.send_json(500, {"error": f"Prediction failed: {e}"}, include_body)
+            return None
+        # Same body for the same cached entry, so clients can revalidate it too
+        return make_resource(json.dumps(entry, indent=2).encode("utf-8"))
+
+    def send_resource(self, resource, include_body):
+        use_gzip = accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        etag = resource["gzip_etag"] if use_gzip else resource["etag"]
+        if etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        body = resource["gzip"] if use_gzip else resource["body"]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def send_json(self, status, data, include_body=True):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=8000, root=".", quiet=False):
+    store = ResourceStore(root)
+    handler = type("Handler", (PredictionHandler,), {"store": store, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    stop = threading.Event()
+    threading.Thread(target=store.watch, args=(stop,), daemon=True).start()
+    return server, stop
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve predictions.json, per-city shards and weather.json.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default=".", help="Directory holding the generated files")
+    parser.add_argument("--quiet", action="store_true", help="Don't log every request")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server, stop = make_server(args.host, args.port, args.root, args.quiet)
+    print(f"🌅 serving {len(server.RequestHandlerClass.store.resources)} resources on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
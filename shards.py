@@ -0,0 +1,62 @@
+# Per-city output files: predictions/<slug>.json plus predictions/index.json
+# with each city's headline numbers and a content hash, so a consumer that
+# wants one city (or just wants to know what changed) doesn't have to pull
+# the whole combined predictions.json.
+import hashlib
+import json
+import os
+
+SHARD_DIR = os.environ.get("PREDICTION_SHARD_DIR", "predictions")
+INDEX_NAME = "index.json"
+
+
+def atomic_write(path, body):
+    # Readers see either the old file or the new one, never a partial write
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def write_if_changed(path, body):
+    try:
+        with open(path, "rb") as f:
+            if f.read() == body:
+                return False
+    except OSError:
+        pass
+    atomic_write(path, body)
+    return True
+
+
+def encode(data):
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def write_shards(predictions, names, directory=SHARD_DIR):
+    # Returns how many shard files were rewritten; unchanged ones are left alone
+    index = {}
+    written = 0
+    for slug, entry in predictions.items():
+        body = encode(entry)
+        filename = f"{slug}.json"
+        written += write_if_changed(os.path.join(directory, filename), body)
+        index[slug] = {
+            "name": names.get(slug, slug),
+            "sunrise_score": entry.get("sunrise_score"),
+            "sunset_score": entry.get("sunset_score"),
+            "updated_at": entry.get("updated_at"),
+            "path": f"{directory}/{filename}",
+            "sha256": hashlib.sha256(body).hexdigest(),
+        }
+
+    # Shards of cities that are no longer generated would otherwise linger
+    wanted = {f"{slug}.json" for slug in predictions} | {INDEX_NAME}
+    for filename in os.listdir(directory):
+        if filename.endswith(".json") and filename not in wanted:
+            os.remove(os.path.join(directory, filename))
+
+    write_if_changed(os.path.join(directory, INDEX_NAME), encode(index))
+    return written
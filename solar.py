@@ -0,0 +1,42 @@
+from astral import Depression
+from astral.moon import moonrise, moonset
+from astral.sun import dawn, dusk, noon, sunrise, sunset
+
+DEPRESSIONS = {
+    "civil": Depression.CIVIL,
+    "nautical": Depression.NAUTICAL,
+    "astronomical": Depression.ASTRONOMICAL,
+}
+
+
+def event_or_none(calculate, *args):
+    # Near the poles some events never happen (e.g. astronomical dawn in a
+    # London June); astral raises ValueError for those, we report None
+    try:
+        return calculate(*args)
+    except ValueError:
+        return None
+
+
+def solar_events(observer, day, tz):
+    # Each event is one transit calculation: 9 in total, where four sun()
+    # calls cost 20 and only ever returned the civil depression
+    events = {
+        "sunrise": event_or_none(sunrise, observer, day, tz),
+        "sunset": event_or_none(sunset, observer, day, tz),
+        "noon": noon(observer, day, tz),
+    }
+    for name, depression in DEPRESSIONS.items():
+        events[f"{name}_dawn"] = event_or_none(dawn, observer, day, depression, tz)
+        events[f"{name}_dusk"] = event_or_none(dusk, observer, day, depression, tz)
+
+    # Same keys astral's sun() uses, so callers can treat this as a drop-in
+    events["dawn"] = events["civil_dawn"]
+    events["dusk"] = events["civil_dusk"]
+    return events
+
+
+def moon_events(observer, day):
+    # astral raises ValueError on the days the moon doesn't rise (or set), which
+    # happens about once a month; the other event is still valid
+    return event_or_none(moonrise, observer, day), event_or_none(moonset, observer, day)
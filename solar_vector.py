@@ -0,0 +1,209 @@
+# Batched sun/twilight times for many cities x many dates with NumPy.
+#
+# This is astral's NOAA algorithm (astral.sun.time_of_transit and friends)
+# evaluated on whole arrays at once, including astral's "retry on the
+# neighbouring day when the event lands on another local date" rule, so the
+# results agree with solar.solar_events() to within a second. Observers are
+# assumed to be at sea level, which is how every city in this repo is defined.
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from astral import refraction_at_zenith
+
+SUN_APPARENT_RADIUS = 32.0 / (60.0 * 2.0)
+RISING = 1
+SETTING = -1
+
+# Event name -> (zenith angle, direction), keys match solar.solar_events()
+EVENTS = {
+    "sunrise": (90.0 + SUN_APPARENT_RADIUS, RISING),
+    "sunset": (90.0 + SUN_APPARENT_RADIUS, SETTING),
+    "civil_dawn": (96.0, RISING),
+    "civil_dusk": (96.0, SETTING),
+    "nautical_dawn": (102.0, RISING),
+    "nautical_dusk": (102.0, SETTING),
+    "astronomical_dawn": (108.0, RISING),
+    "astronomical_dusk": (108.0, SETTING),
+}
+EVENT_NAMES = ["noon"] + list(EVENTS)
+
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+
+def epoch_days(dates):
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def solar_terms(jc):
+    # Geometric terms shared by the declination and the equation of time
+    l0 = (280.46646 + jc * (36000.76983 + 0.0003032 * jc)) % 360.0
+    m = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+    e = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+
+    mrad = np.radians(m)
+    c = (
+        np.sin(mrad) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + np.sin(2 * mrad) * (0.019993 - 0.000101 * jc)
+        + np.sin(3 * mrad) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_long = l0 + c - 0.00569 - 0.00478 * np.sin(omega)
+
+    seconds = 21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))
+    obliquity = 23.0 + (26.0 + seconds / 60.0) / 60.0 + 0.00256 * np.cos(omega)
+
+    declination = np.degrees(np.arcsin(np.sin(np.radians(obliquity)) * np.sin(np.radians(apparent_long))))
+
+    y = np.tan(np.radians(obliquity) / 2.0) ** 2
+    l0rad = np.radians(l0)
+    eqtime = np.degrees(
+        y * np.sin(2 * l0rad)
+        - 2 * e * np.sin(mrad)
+        + 4 * e * y * np.sin(mrad) * np.cos(2 * l0rad)
+        - 0.5 * y * y * np.sin(4 * l0rad)
+        - 1.25 * e * e * np.sin(2 * mrad)
+    ) * 4.0
+    return declination, eqtime
+
+
+def julian_century(julian_day):
+    return (julian_day - 2451545.0) / 36525.0
+
+
+class DailyTerms:
+    # Declination and equation of time change slowly, so they are evaluated once
+    # per calendar day and cubic-interpolated at the fractional day each transit
+    # needs, instead of once per city x date x event x iteration. Linear
+    # interpolation is not enough: near the latitude where a twilight stops
+    # happening, small declination errors move the event by many seconds.
+    def __init__(self, days):
+        self.first = days.min() - 3
+        grid = np.arange(self.first, days.max() + 5, dtype=float)
+        self.declination, self.eqtime = solar_terms(julian_century(grid + UNIX_EPOCH_JULIAN_DAY))
+
+    def at(self, fractional_days):
+        position = fractional_days - self.first
+        index = np.floor(position).astype(np.int64)
+        t = position - index
+        # Lagrange weights for the samples at index-1, index, index+1, index+2
+        weights = (
+            -t * (t - 1) * (t - 2) / 6,
+            (t + 1) * (t - 1) * (t - 2) / 2,
+            -(t + 1) * t * (t - 2) / 2,
+            (t + 1) * t * (t - 1) / 6,
+        )
+        declination = sum(w * self.declination[index + k] for k, w in zip(range(-1, 3), weights))
+        eqtime = sum(w * self.eqtime[index + k] for k, w in zip(range(-1, 3), weights))
+        return declination, eqtime
+
+
+def transit_epoch(latitudes, longitudes, days, zenith, direction, terms):
+    # latitudes/longitudes are (cities, 1), days is (1, dates); NaN where the sun
+    # never reaches the zenith
+    latitudes = np.clip(latitudes, -89.8, 89.8)
+    cos_zenith = np.cos(np.radians(zenith + refraction_at_zenith(zenith)))
+    sin_lat = np.sin(np.radians(latitudes))
+    cos_lat = np.cos(np.radians(latitudes))
+
+    adjustment = np.zeros((1, 1))
+    time_utc = None
+    for _ in range(2):
+        declination, eqtime = terms.at(days + adjustment)
+        dec_rad = np.radians(declination)
+        h = (cos_zenith - sin_lat * np.sin(dec_rad)) / (cos_lat * np.cos(dec_rad))
+        hour_angle = np.arccos(h) * direction
+        offset = (-longitudes - np.degrees(hour_angle)) * 4.0 - eqtime
+        offset = np.where(offset < -720.0, offset + 1440.0, offset)
+        time_utc = 720.0 + offset
+        # NaN (no transit) positions still need a valid index into DailyTerms
+        adjustment = np.nan_to_num(time_utc / 1440.0)
+
+    return days * 86400.0 + time_utc * 60.0
+
+
+def utc_offsets(timezones, dates):
+    # Offset in seconds at local noon of each date, computed once per distinct zone
+    offsets = np.zeros((len(timezones), len(dates)))
+    noons = [datetime(d.year, d.month, d.day, 12) for d in dates]
+    by_zone = {}
+    for row, name in enumerate(timezones):
+        if name not in by_zone:
+            zone = ZoneInfo(name)
+            by_zone[name] = [zone.utcoffset(noon).total_seconds() for noon in noons]
+        offsets[row] = by_zone[name]
+    return offsets
+
+
+def solar_table(latitudes, longitudes, timezones, dates):
+    dates = list(dates)
+    latitudes = np.asarray(latitudes, dtype=float)[:, None]
+    longitudes = np.asarray(longitudes, dtype=float)[:, None]
+    days = epoch_days(dates)[None, :].astype(float)
+    offsets = utc_offsets(timezones, dates)
+    terms = DailyTerms(days)
+
+    with np.errstate(invalid="ignore"):
+        _, eqtime = terms.at(days)
+        noon_minutes = 720.0 - 4.0 * longitudes - eqtime
+        table = {"noon": days * 86400.0 + np.floor(noon_minutes * 60.0)}
+
+        for name, (zenith, direction) in EVENTS.items():
+            # astral retries on the neighbouring day when the event falls on another
+            # local date, so evaluate yesterday/today/tomorrow and pick the match
+            candidates = [transit_epoch(latitudes, longitudes, days + shift, zenith, direction, terms) for shift in (-1, 0, 1)]
+            today = candidates[1]
+            local_day = np.floor((today + offsets) / 86400.0)
+            result = np.where(local_day < days, candidates[2], np.where(local_day > days, candidates[0], today))
+            matches = np.floor((result + offsets) / 86400.0) == days
+            table[name] = np.where(matches, result, np.nan)
+
+    return table
+
+
+def city_table(cities, dates):
+    return solar_table(
+        [city["observer"].latitude for city in cities],
+        [city["observer"].longitude for city in cities],
+        [city["timezone"] for city in cities],
+        dates,
+    )
+
+
+def date_range(start, days):
+    return [start + timedelta(days=offset) for offset in range(days)]
+
+
+def max_error_against_astral(cities, dates):
+    # Largest absolute difference in seconds from solar.solar_events(); a missing
+    # event on one side only counts as infinite
+    from solar import solar_events
+
+    table = city_table(cities, dates)
+    worst = 0.0
+    for row, city in enumerate(cities):
+        tz = ZoneInfo(city["timezone"])
+        for col, day in enumerate(dates):
+            events = solar_events(city["observer"], day, tz)
+            for name in EVENT_NAMES:
+                expected = events[name]
+                actual = table[name][row, col]
+                if expected is None or np.isnan(actual):
+                    if (expected is None) != bool(np.isnan(actual)):
+                        return float("inf")
+                    continue
+                worst = max(worst, abs(expected.timestamp() - actual))
+    return worst
+
+
+if __name__ == "__main__":
+    from generate_prediction import cities
+
+    start = date.today()
+    table = city_table(cities, date_range(start, 7))
+    for row, city in enumerate(cities):
+        sunsets = [
+            "-" if np.isnan(value) else datetime.fromtimestamp(value, ZoneInfo(city["timezone"])).strftime("%-I:%M %p")
+            for value in table["sunset"][row]
+        ]
+        print(f"{city['slug']:<16} " + "  ".join(sunsets))
@@ -0,0 +1,84 @@
+# Incremental reader for the first N items of one array inside a JSON response.
+#
+# Meteosource has no way to ask for fewer hours, so instead of downloading
+# and parsing the whole hourly section we decode chunks as they arrive and
+# stop (closing the connection) once we have the hours we use.
+import codecs
+import json
+import re
+import time
+
+WHITESPACE = " \t\r\n"
+
+
+class ArrayPrefixReader:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.exhausted = False
+        self.bytes_read = 0
+        self.parse_seconds = 0.0
+
+    def read_more(self):
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.exhausted = True
+            self.buffer += self.decoder.decode(b"", final=True)
+            return False
+        self.bytes_read += len(chunk)
+        started = time.perf_counter()
+        self.buffer += self.decoder.decode(chunk)
+        self.parse_seconds += time.perf_counter() - started
+        return True
+
+    def seek_key(self, key):
+        # Moves past `"key": [` or `"key": {`, reading more input as needed
+        pattern = re.compile(r'"%s"\s*:\s*[\[{]' % re.escape(key))
+        while True:
+            started = time.perf_counter()
+            match = pattern.search(self.buffer, self.position)
+            self.parse_seconds += time.perf_counter() - started
+            if match:
+                self.position = match.end()
+                return
+            if not self.read_more():
+                raise ValueError(f"Key {key!r} not found in response")
+
+    def next_item(self):
+        # Next array element, or None at the closing bracket
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE + ",":
+                self.position += 1
+            if self.position < len(self.buffer):
+                if self.buffer[self.position] == "]":
+                    return None
+                started = time.perf_counter()
+                try:
+                    item, end = self.json_decoder.raw_decode(self.buffer, self.position)
+                except ValueError:
+                    item, end = None, None
+                self.parse_seconds += time.perf_counter() - started
+                # An item that runs to the end of the buffer may be cut short (e.g. a number)
+                if end is not None and (end < len(self.buffer) or self.exhausted):
+                    self.position = end
+                    return item
+            if not self.read_more():
+                raise ValueError("Response ended inside an array")
+
+    def read_array(self, keys, limit):
+        for key in keys:
+            self.seek_key(key)
+        items = []
+        while len(items) < limit:
+            item = self.next_item()
+            if item is None:
+                break
+            items.append(item)
+            # Drop what has been consumed so the buffer stays small
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+        return items
@@ -0,0 +1,122 @@
+# In-process run metrics: timing spans, latency histograms and counters, written
+# at the end of a run as a JSON report and optionally in Prometheus text format.
+#
+# Everything is keyed by metric name plus a sorted tuple of label pairs, e.g.
+#   stage_seconds{stage="astronomy", city="tokyo"}
+#   provider_request_seconds{provider="meteosource", outcome="ok"}
+#   fallbacks_total{kind="scores", city="tokyo"}
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from shards import atomic_write
+
+# Upper bounds in seconds, Prometheus style (cumulative, +Inf implied)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_PREFIX = "sunset_"
+
+lock = threading.Lock()
+histograms = {}
+counters = {}
+
+
+def label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def observe(metric, seconds, **labels):
+    key = (metric, label_key(labels))
+    with lock:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        histogram["max"] = max(histogram["max"], seconds)
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][index] += 1
+                break
+
+
+def increment(metric, amount=1, **labels):
+    key = (metric, label_key(labels))
+    with lock:
+        counters[key] = counters.get(key, 0) + amount
+
+
+@contextmanager
+def span(stage, **labels):
+    # Times the block into stage_seconds, even when it raises
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+
+def snapshot():
+    with lock:
+        return (
+            {key: {**value, "buckets": list(value["buckets"])} for key, value in histograms.items()},
+            dict(counters),
+        )
+
+
+def build_report(extra=None):
+    histogram_items, counter_items = snapshot()
+    report = {"generated_at": datetime.now(timezone.utc).isoformat(), "histograms": {}, "counters": {}}
+    for (metric, labels), value in sorted(histogram_items.items()):
+        cumulative = []
+        total = 0
+        for count in value["buckets"]:
+            total += count
+            cumulative.append(total)
+        report["histograms"].setdefault(metric, []).append({
+            "labels": dict(labels),
+            "count": value["count"],
+            "sum": round(value["sum"], 6),
+            "max": round(value["max"], 6),
+            "buckets": {str(bound): count for bound, count in zip(BUCKETS, cumulative)},
+        })
+    for (metric, labels), value in sorted(counter_items.items()):
+        report["counters"].setdefault(metric, []).append({"labels": dict(labels), "value": value})
+    report.update(extra or {})
+    return report
+
+
+def prometheus_labels(labels, **more):
+    pairs = list(labels.items()) + list(more.items())
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def prometheus_text(report):
+    lines = []
+    for metric, series in report["histograms"].items():
+        name = PROMETHEUS_PREFIX + metric
+        lines.append(f"# TYPE {name} histogram")
+        for item in series:
+            for bound, count in item["buckets"].items():
+                lines.append(f"{name}_bucket{prometheus_labels(item['labels'], le=bound)} {count}")
+            lines.append(f"{name}_bucket{prometheus_labels(item['labels'], le='+Inf')} {item['count']}")
+            lines.append(f"{name}_sum{prometheus_labels(item['labels'])} {item['sum']}")
+            lines.append(f"{name}_count{prometheus_labels(item['labels'])} {item['count']}")
+    for metric, series in report["counters"].items():
+        name = PROMETHEUS_PREFIX + metric
+        lines.append(f"# TYPE {name} counter")
+        for item in series:
+            lines.append(f"{name}{prometheus_labels(item['labels'])} {item['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path, extra=None, prometheus_path=None):
+    report = build_report(extra)
+    atomic_write(path, json.dumps(report, indent=2).encode("utf-8"))
+    if prometheus_path:
+        atomic_write(prometheus_path, prometheus_text(report).encode("utf-8"))
+    return report
@@ -1,15 +1,41 @@
 import os
 import json
-import requests
+import time
+import telemetry
+from providers import ProviderClient, print_provider_summary, provider_summaries, quota_summaries
 
 API_KEY = os.getenv("WEATHERAPI_KEY")
 LOCATION = "San Francisco"
 OUTPUT_PATH = "weather.json"
+REPORT_PATH = "weather_report.json"
+
+weatherapi_client = ProviderClient("weatherapi", max_concurrency=1)
+
+def write_report(started, ok):
+    telemetry.observe("stage_seconds", time.perf_counter() - started, stage="run")
+    telemetry.write_report(REPORT_PATH, {
+        "run": {"location": LOCATION, "ok": ok},
+        "providers": provider_summaries(),
+        "quota": quota_summaries(),
+    }, os.environ.get("WEATHER_REPORT_PROMETHEUS_PATH"))
 
 def fetch_weather():
+    started = time.perf_counter()
+    try:
+        result = get_current_weather()
+    except Exception:
+        telemetry.increment("provider_failures_total", provider="weatherapi", city=LOCATION)
+        write_report(started, ok=False)
+        raise
+    write_report(started, ok=True)
+    return result
+
+def get_current_weather():
     url = f"https://api.weatherapi.com/v1/current.json?key={API_KEY}&q={LOCATION}"
-    res = requests.get(url)
-    data = res.json()
+    with telemetry.span("weatherapi"):
+        res = weatherapi_client.get(url, timeout=10)
+        data = res.json()
+    print_provider_summary()
 
     print("🌤️ Raw WeatherAPI response:")
     print(json.dumps(data, indent=2))
@@ -24,8 +50,10 @@ def fetch_weather():
         "condition": data["current"]["condition"]["text"]
     }
 
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(result, f, indent=2)
+    with telemetry.span("serialize", output=OUTPUT_PATH):
+        with open(OUTPUT_PATH, "w") as f:
+            json.dump(result, f, indent=2)
+    return result
 
 if __name__ == "__main__":
     fetch_weather()
\ No newline at end of file